@@ -1,44 +1,54 @@
+import base64
 import copy
 import csv
+import hashlib
 import io
 import json
 import os
+import re
 import secrets
+import shutil
 import subprocess
 import tempfile
+import uuid
 import logging
 import sys
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 from pathlib import Path
-from functools import wraps
-from threading import Lock, Thread
-from time import perf_counter, sleep, time
-from typing import Any, DefaultDict, Dict, Iterator, List, NamedTuple, Optional, Tuple, TypedDict, cast
-from urllib.parse import urlparse, urlunparse
+from functools import lru_cache, wraps
+from threading import Event, Lock, Thread
+from time import gmtime, perf_counter, time
+from types import MappingProxyType
+from typing import IO, Any, DefaultDict, Deque, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple, TypedDict, Union, cast
+from urllib.parse import quote, urlparse, urlunparse
 
 import click
+import orjson
 import structlog
 import jwt  # type: ignore[import]
+from jwt.utils import base64url_encode  # type: ignore[import]
 from flask import Flask, Response, jsonify, request, g, stream_with_context, send_file
 from flask_cors import CORS
 from flask.cli import with_appcontext
 from werkzeug.datastructures import FileStorage
 from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_options_header
+from werkzeug.routing import BaseConverter
 from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.utils import secure_filename
 
 from backup_manager import BackupManager
-from import_data import import_csv as run_import_csv
-from https_utils import resolve_ssl_context
-from ingest import process_wearable_raw_by_dedupe_keys
+from json_utils import ORJSONProvider, dumps_bytes, dumps_log_event
 from models import Activity, Entry  # noqa: F401 - ensure models registered
 from security import (
     ValidationError,
+    enforce_rate_limit,
     error_response,
-    rate_limit,
+    parse_json_body,
     require_api_key,
     validate_activity_create_payload,
     limit_request,
@@ -51,7 +61,13 @@ from security import (
     validate_user_update_payload,
     validate_wearable_batch_payload,
     require_admin,
+    require_user,
     jwt_required,
+    clear_current_user,
+    get_current_user,
+    get_current_user_id,
+    set_current_user,
+    static_error_response,
 )
 from extensions import db, migrate
 from sqlalchemy import text
@@ -59,11 +75,19 @@ from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from db_utils import connection as sa_connection, transactional_connection
 
 
+_LOG_LEVEL = logging.getLevelName(os.environ.get("LOG_LEVEL", "INFO").upper())
+if not isinstance(_LOG_LEVEL, int):
+    _LOG_LEVEL = logging.INFO
+# Decided once: the filtering logger would drop request.completed anyway, but
+# only after bind() had built a new logger and context dict for it.
+_REQUEST_LOG_ENABLED = _LOG_LEVEL <= logging.INFO
+
+
 def configure_logging() -> None:
-    logging.basicConfig(format="%(message)s", stream=sys.stdout, level=logging.INFO)
+    logging.basicConfig(format="%(message)s", stream=sys.stdout, level=_LOG_LEVEL)
     structlog.configure(
         context_class=dict,
-        wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+        wrapper_class=structlog.make_filtering_bound_logger(_LOG_LEVEL),
         logger_factory=structlog.stdlib.LoggerFactory(),
         processors=[
             structlog.contextvars.merge_contextvars,
@@ -71,7 +95,7 @@ def configure_logging() -> None:
             structlog.processors.TimeStamper(fmt="iso", key="timestamp"),
             structlog.processors.StackInfoRenderer(),
             structlog.processors.format_exc_info,
-            structlog.processors.JSONRenderer(),
+            structlog.processors.JSONRenderer(serializer=dumps_log_event),
         ],
     )
     logging.getLogger("werkzeug").setLevel(logging.WARNING)
@@ -89,6 +113,8 @@ install_runtime_log_handler()
 logger = structlog.get_logger("mosaic.backend")
 
 class MosaicFlask(Flask):
+    json_provider_class = ORJSONProvider
+
     def run(
         self,
         host: Optional[str] = None,
@@ -103,40 +129,115 @@ class MosaicFlask(Flask):
             port = int(os.environ.get("FLASK_RUN_PORT", os.environ.get("PORT", "5000")))
         ssl_context = options.get("ssl_context")
         if ssl_context is None:
+            from https_utils import resolve_ssl_context  # only needed by the dev server
+
             ssl_context = resolve_ssl_context()
             if ssl_context:
                 options["ssl_context"] = ssl_context
         super().run(host=host, port=port, debug=debug, load_dotenv=load_dotenv, **options)
 
 
+class IdConverter(BaseConverter):
+    """``<id:...>`` path segment: an unsigned database id.
+
+    Leaner than ``<int:...>``: the regex already guarantees plain ASCII digits
+    that fit a BIGINT, so ``to_python`` is a bare ``int`` call without the
+    fixed-digit and min/max checks of Werkzeug's ``IntegerConverter``.
+    """
+
+    regex = r"[0-9]{1,18}"
+    weight = 50
+    to_python = staticmethod(int)  # type: ignore[assignment]
+
+
 app = MosaicFlask(__name__)
+app.url_map.converters["id"] = IdConverter
 
 
-def _resolve_cors_origins() -> list[str]:
+def _resolve_cors_origins() -> Tuple[str, ...]:
     raw = os.environ.get("CORS_ALLOW_ORIGINS", "")
     if raw.strip():
-        parsed = [origin.strip() for origin in raw.split(",") if origin.strip()]
+        parsed = tuple(origin.strip() for origin in raw.split(",") if origin.strip())
         if parsed:
             return parsed
-    return ["http://localhost:3000", "http://127.0.0.1:3000"]
+    return ("http://localhost:3000", "http://127.0.0.1:3000")
 
 
+_REGEX_ORIGIN_CHARS = frozenset("*\\]?$^[()")
+
+
+def _compile_cors_origins(origins: Sequence[str]) -> list[str] | re.Pattern[str]:
+    """Fold literal origins into one case-insensitive pattern.
+
+    flask-cors scans the origin list on every request and sniffs each entry for
+    regex characters; a single compiled pattern turns that into one match.
+    Wildcard or regex-style entries are passed through untouched.
+    """
+    if any(_REGEX_ORIGIN_CHARS.intersection(origin) for origin in origins):
+        return list(origins)
+    alternation = "|".join(re.escape(origin) for origin in dict.fromkeys(origins))
+    return re.compile(rf"(?:{alternation})\Z", re.IGNORECASE)
+
+
+_CORS_ORIGINS = _compile_cors_origins(_resolve_cors_origins())
+_CORS_ALLOW_HEADERS = (
+    "Content-Type",
+    "Authorization",
+    "X-CSRF-Token",
+    "X-API-Key",
+    "X-Idempotency-Key",
+    "X-Overwrite-Existing",
+)
+_CORS_ALLOW_HEADERS_LOWER = frozenset(header.lower() for header in _CORS_ALLOW_HEADERS)
+_CORS_EXPOSE_HEADERS = ("Content-Disposition", "X-Next-Cursor")
+
 CORS(
     app,
-    origins=_resolve_cors_origins(),
+    origins=_CORS_ORIGINS,
     supports_credentials=True,
-    allow_headers=[
-        "Content-Type",
-        "Authorization",
-        "X-CSRF-Token",
-        "X-API-Key",
-        "X-Idempotency-Key",
-        "X-Overwrite-Existing",
-    ],
-    expose_headers=["Content-Disposition"],
+    allow_headers=list(_CORS_ALLOW_HEADERS),
+    expose_headers=list(_CORS_EXPOSE_HEADERS),
+)
+
+# Everything in a preflight answer except the echoed origin and request headers
+# is fixed by the CORS config above, so it is built once.
+_PREFLIGHT_BASE_HEADERS = (
+    ("Access-Control-Allow-Credentials", "true"),
+    ("Access-Control-Allow-Methods", "DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"),
+    ("Access-Control-Expose-Headers", ", ".join(_CORS_EXPOSE_HEADERS)),
+    ("Vary", "Origin"),
 )
 
 
+def _answer_cors_preflight(method: str) -> Optional[Response]:
+    """Answer allowed preflights before auth, timing and flask-cors run.
+
+    Called first from _before_request so it precedes every other check.
+    Anything unusual (unknown route, regex origin config, disallowed origin)
+    falls through to the regular flask-cors handling.
+    """
+    if method != "OPTIONS" or request.url_rule is None:
+        return None
+    origin = request.headers.get("Origin")
+    if not origin or "Access-Control-Request-Method" not in request.headers:
+        return None
+    if not isinstance(_CORS_ORIGINS, re.Pattern) or not _CORS_ORIGINS.match(origin):
+        return None
+
+    response = Response(status=204, headers=_PREFLIGHT_BASE_HEADERS)
+    response.headers["Access-Control-Allow-Origin"] = origin
+    requested = request.headers.get("Access-Control-Request-Headers")
+    if requested:
+        allowed = [
+            header.strip()
+            for header in requested.split(",")
+            if header.strip().lower() in _CORS_ALLOW_HEADERS_LOWER
+        ]
+        if allowed:
+            response.headers["Access-Control-Allow-Headers"] = ", ".join(allowed)
+    return response
+
+
 def _resolve_database_uri() -> str:
     direct_uri = os.environ.get("DATABASE_URL")
     if direct_uri:
@@ -157,6 +258,9 @@ def _resolve_database_uri() -> str:
 
 app.config["SQLALCHEMY_DATABASE_URI"] = _resolve_database_uri()
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Stale pooled connections are detected on checkout, so /healthz can rely on
+# a briefly cached probe instead of a round trip per call.
+app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {"pool_pre_ping": True, "pool_recycle": 1800})
 app.config.setdefault(
     "RATE_LIMITS",
     {
@@ -169,8 +273,10 @@ app.config.setdefault(
         "finalize_day": {"limit": 10, "window": 60},
         "import_csv": {"limit": 5, "window": 300},
         "wearable_ingest": {"limit": 60, "window": 60},
-        "login": {"limit": 10, "window": 60},
-        "register": {"limit": 5, "window": 3600},
+        # Credential endpoints get the strict rolling log: GCRA would let a
+        # burst plus refill through within one window.
+        "login": {"limit": 10, "window": 60, "algo": "sliding"},
+        "register": {"limit": 5, "window": 3600, "algo": "sliding"},
     },
 )
 app.config["API_KEY"] = os.environ.get("MOSAIC_API_KEY")
@@ -178,12 +284,18 @@ app.config.setdefault("PUBLIC_ENDPOINTS", {"home"})
 app.config.setdefault("JWT_SECRET", os.environ.get("MOSAIC_JWT_SECRET") or "change-me")
 app.config.setdefault("JWT_ALGORITHM", "HS256")
 app.config.setdefault("JWT_EXP_MINUTES", int(os.environ.get("MOSAIC_JWT_EXP_MINUTES", "60")))
-app.config["PUBLIC_ENDPOINTS"].update({"login", "register", "metrics", "health", "healthz"})
+# Internal nginx location (e.g. "/_backups/") aliased to the backup directory;
+# when set, downloads are handed to the proxy instead of read through Python.
+app.config.setdefault("BACKUP_ACCEL_REDIRECT_PREFIX", os.environ.get("MOSAIC_BACKUP_ACCEL_REDIRECT_PREFIX") or None)
+app.config["PUBLIC_ENDPOINTS"] = frozenset(
+    app.config["PUBLIC_ENDPOINTS"] | {"login", "register", "metrics", "health", "healthz"}
+)
 
 db.init_app(app)
 migrate.init_app(app, db)
-app.register_blueprint(logs_bp)
-app.register_blueprint(wearable_read_bp)
+_BLUEPRINTS = (logs_bp, wearable_read_bp)
+for _blueprint in _BLUEPRINTS:
+    app.register_blueprint(_blueprint)
 
 ERROR_CODE_BY_STATUS = {
     400: "bad_request",
@@ -198,6 +310,11 @@ ERROR_CODE_BY_STATUS = {
     502: "bad_gateway",
     503: "service_unavailable",
 }
+# Every 4xx/5xx status resolved up front, including the generic fallbacks.
+_HTTP_EXCEPTION_CODES = {
+    status: ERROR_CODE_BY_STATUS.get(status, "internal_error" if status >= 500 else "bad_request")
+    for status in range(400, 600)
+}
 
 SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
 
@@ -210,13 +327,40 @@ CacheEntry = Tuple[float, object, Optional[CacheScope]]
 
 
 _cache_storage: Dict[str, CacheEntry] = {}
+# prefix -> scope -> keys, so a single user's entries can be evicted without
+# scanning (or dropping) everyone else's.
+_cache_index: Dict[str, Dict[Optional[CacheScope], Set[str]]] = {}
 _cache_lock = Lock()
 TODAY_CACHE_TTL = 60
+# /today is polled by the UI, so concurrent misses for one user and date wait
+# for a single query instead of each hitting the database.
+_TODAY_INFLIGHT_WAIT_SECONDS = 10
+_today_inflight: Dict[str, Event] = {}
+_today_inflight_lock = Lock()
 STATS_CACHE_TTL = 300
 
+_JWT_DECODE_CACHE_MAX_ENTRIES = 10_000
+_JWT_DECODE_CACHE_TTL_SECONDS = 60
+_jwt_decode_cache_lock = Lock()
+# sha256(secret, algorithm, token) -> (payload, expires_at); bounded LRU so
+# token churn cannot grow it without limit, and only digests are held so the
+# cache never keeps bearer tokens or the secret around.
+_jwt_decode_cache: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+
+_CSV_IMPORT_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+_CSV_IMPORT_COPY_CHUNK_BYTES = 1 << 20
+_CSV_IMPORT_RAW_MIMETYPES = frozenset({"text/csv", "application/octet-stream"})
+# Background imports (Prefer: respond-async); finished jobs are kept for polling.
+_CSV_IMPORT_JOB_RETENTION_SECONDS = 3600
+_import_jobs: Dict[str, Dict[str, Any]] = {}
+_import_jobs_lock = Lock()
+_import_executor: Optional[ThreadPoolExecutor] = None
+
 _IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "600"))
 _idempotency_lock = Lock()
-_idempotency_store: Dict[str, Tuple[float, dict, int]] = {}
+# token -> (expires_at, encoded body, status). The TTL is fixed, so insertion
+# order is expiry order and expired entries are pruned from the front.
+_idempotency_store: "OrderedDict[str, Tuple[float, bytes, int]]" = OrderedDict()
 
 
 def _cache_scope_key_parts(scope: Optional[CacheScope]) -> Tuple[str, ...]:
@@ -301,14 +445,29 @@ def _initialize_metrics_state() -> MetricsState:
 
 
 _metrics_state: MetricsState = _initialize_metrics_state()
+# Bumped on every recorded request so the rendered Prometheus body can be
+# reused across scrapes until something actually changes.
+_metrics_version = 0
+# (method, endpoint, status, duration_ms, is_error, recorded_at) tuples waiting
+# to be folded into _metrics_state.
+_pending_metrics_samples: Deque[Tuple[str, str, int, float, bool, float]] = deque()
+_METRICS_SAMPLE_FLUSH_THRESHOLD = 1024
+_metrics_text_cache: Optional[Tuple[int, bytes]] = None
 _metrics_logger_thread: Optional[Thread] = None
+_HEALTH_CHECK_TTL_SECONDS = float(os.environ.get("HEALTH_CHECK_TTL_SECONDS", "2"))
+_health_cache_lock = Lock()
+_db_health_cache: Optional[Tuple[float, bool]] = None
+_metrics_logger_stop = Event()
 
 
 def _resolve_metrics_dimensions() -> Tuple[str, str]:
-    method = (getattr(g, "metrics_method", None) or getattr(request, "method", "GET") or "GET").upper()
-    endpoint = getattr(g, "metrics_endpoint", None)
-    if not endpoint:
-        endpoint = request.endpoint
+    try:
+        return g.metrics_method, g.metrics_endpoint
+    except AttributeError:
+        # Only when _before_request never ran, e.g. a teardown-time failure.
+        pass
+    method = (getattr(request, "method", "GET") or "GET").upper()
+    endpoint = request.endpoint
     if not endpoint:
         rule = getattr(request, "url_rule", None)
         endpoint = getattr(rule, "rule", None) if rule else None
@@ -318,13 +477,28 @@ def _resolve_metrics_dimensions() -> Tuple[str, str]:
 
 
 def _record_request_metrics(status_code: int, duration_ms: float, *, is_error: bool = False) -> None:
+    # deque.append is atomic, so request threads never wait on _metrics_lock
+    # here; samples are folded into _metrics_state by whoever reads it next.
     method, endpoint = _resolve_metrics_dimensions()
-    is_client_error = 400 <= status_code < 500
-    is_server_error = status_code >= 500
-    now = time()
+    _pending_metrics_samples.append((method, endpoint, status_code, duration_ms, is_error, time()))
+    if len(_pending_metrics_samples) >= _METRICS_SAMPLE_FLUSH_THRESHOLD and _metrics_lock.acquire(blocking=False):
+        try:
+            _drain_metrics_samples_locked()
+        finally:
+            _metrics_lock.release()
 
-    with _metrics_lock:
-        bucket = _metrics_state["per_endpoint"][(method, endpoint)]
+
+def _drain_metrics_samples_locked() -> None:
+    """Fold queued samples into ``_metrics_state``; caller holds ``_metrics_lock``."""
+    global _metrics_version
+    applied = 0
+    per_endpoint = _metrics_state["per_endpoint"]
+    while True:
+        try:
+            method, endpoint, status_code, duration_ms, is_error, recorded_at = _pending_metrics_samples.popleft()
+        except IndexError:
+            break
+        bucket = per_endpoint[(method, endpoint)]
         bucket["count"] += 1
         bucket["total_latency_ms"] += duration_ms
         bucket["status_counts"][status_code] += 1
@@ -333,24 +507,15 @@ def _record_request_metrics(status_code: int, duration_ms: float, *, is_error: b
         _metrics_state["latency_total_ms"] += duration_ms
         _metrics_state["status_counts"][status_code] += 1
 
-        error_recorded = False
-        if is_client_error:
+        if 400 <= status_code < 500:
             bucket["errors_4xx"] += 1
             _metrics_state["errors_4xx"] += 1
-            error_recorded = True
-        if is_server_error:
+        elif status_code >= 500 or is_error:
             bucket["errors_5xx"] += 1
             _metrics_state["errors_5xx"] += 1
-            error_recorded = True
-        if is_error and not error_recorded:
-            bucket["errors_5xx"] += 1
-            _metrics_state["errors_5xx"] += 1
-        _metrics_state["last_updated"] = now
-
-
-def _now_perf_counter() -> float:
-    """Indirection so tests can monkeypatch app.perf_counter reliably."""
-    return getattr(sys.modules[__name__], "perf_counter")()
+        _metrics_state["last_updated"] = recorded_at
+        applied += 1
+    _metrics_version += applied
 
 
 def reset_metrics_state() -> None:
@@ -358,54 +523,110 @@ def reset_metrics_state() -> None:
     Reset the in-memory metrics store. Intended for use in tests.
     """
 
-    global _metrics_state
+    global _metrics_state, _metrics_version, _metrics_text_cache
     with _metrics_lock:
+        _pending_metrics_samples.clear()
         _metrics_state = _initialize_metrics_state()
+        _metrics_version = 0
+        _metrics_text_cache = None
+
+
+class MetricsTotals(NamedTuple):
+    requests_total: int
+    errors_4xx: int
+    errors_5xx: int
+    last_updated: Optional[float]
+
+
+def get_metrics_totals() -> MetricsTotals:
+    """Global counters only, for callers that do not need per-endpoint detail."""
+    with _metrics_lock:
+        _drain_metrics_samples_locked()
+        return MetricsTotals(
+            requests_total=_metrics_state["requests_total"],
+            errors_4xx=_metrics_state["errors_4xx"],
+            errors_5xx=_metrics_state["errors_5xx"],
+            last_updated=_metrics_state["last_updated"],
+        )
 
 
 def get_metrics_json() -> MetricsSnapshot:
+    # Copy raw counters under the lock and do the division, rounding and
+    # string-keying afterwards so request threads are not held up by a scrape.
     with _metrics_lock:
+        _drain_metrics_samples_locked()
         requests_total = _metrics_state["requests_total"]
         total_latency_ms = _metrics_state["latency_total_ms"]
-        avg_latency_ms = total_latency_ms / requests_total if requests_total else 0.0
+        errors_4xx = _metrics_state["errors_4xx"]
+        errors_5xx = _metrics_state["errors_5xx"]
+        status_counts = list(_metrics_state["status_counts"].items())
         last_updated = _metrics_state.get("last_updated")
-        endpoints: List[EndpointSnapshot] = []
-        for (method, endpoint), bucket in _metrics_state["per_endpoint"].items():
-            count = bucket["count"]
-            avg_endpoint_latency = bucket["total_latency_ms"] / count if count else 0.0
-            endpoints.append(
-                EndpointSnapshot(
-                    method=method,
-                    endpoint=endpoint,
-                    count=count,
-                    avg_latency_ms=round(avg_endpoint_latency, 2),
-                    total_latency_ms=round(bucket["total_latency_ms"], 2),
-                    errors_4xx=bucket["errors_4xx"],
-                    errors_5xx=bucket["errors_5xx"],
-                    status_counts={
-                        str(code): value for code, value in bucket["status_counts"].items()
-                    },
-                )
+        buckets = [
+            (
+                method,
+                endpoint,
+                bucket["count"],
+                bucket["total_latency_ms"],
+                bucket["errors_4xx"],
+                bucket["errors_5xx"],
+                list(bucket["status_counts"].items()),
+            )
+            for (method, endpoint), bucket in _metrics_state["per_endpoint"].items()
+        ]
+
+    endpoints: List[EndpointSnapshot] = []
+    for method, endpoint, count, endpoint_latency_ms, endpoint_4xx, endpoint_5xx, endpoint_statuses in buckets:
+        avg_endpoint_latency = endpoint_latency_ms / count if count else 0.0
+        endpoints.append(
+            EndpointSnapshot(
+                method=method,
+                endpoint=endpoint,
+                count=count,
+                avg_latency_ms=round(avg_endpoint_latency, 2),
+                total_latency_ms=round(endpoint_latency_ms, 2),
+                errors_4xx=endpoint_4xx,
+                errors_5xx=endpoint_5xx,
+                status_counts={str(code): value for code, value in endpoint_statuses},
             )
-        endpoints.sort(key=lambda item: (item["endpoint"], item["method"]))
-
-        return MetricsSnapshot(
-            requests_total=requests_total,
-            total_latency_ms=round(total_latency_ms, 2),
-            avg_latency_ms=round(avg_latency_ms, 2),
-            errors_total={
-                "4xx": _metrics_state["errors_4xx"],
-                "5xx": _metrics_state["errors_5xx"],
-            },
-            status_counts={
-                str(code): value for code, value in _metrics_state["status_counts"].items()
-            },
-            endpoints=endpoints,
-            last_updated=_format_timestamp(last_updated),
         )
+    endpoints.sort(key=lambda item: (item["endpoint"], item["method"]))
+
+    avg_latency_ms = total_latency_ms / requests_total if requests_total else 0.0
+    return MetricsSnapshot(
+        requests_total=requests_total,
+        total_latency_ms=round(total_latency_ms, 2),
+        avg_latency_ms=round(avg_latency_ms, 2),
+        errors_total={
+            "4xx": errors_4xx,
+            "5xx": errors_5xx,
+        },
+        status_counts={str(code): value for code, value in status_counts},
+        endpoints=endpoints,
+        last_updated=_format_timestamp(last_updated),
+    )
 
 
 def get_metrics_text() -> str:
+    return get_metrics_text_bytes().decode("utf-8")
+
+
+def get_metrics_text_bytes() -> bytes:
+    global _metrics_text_cache
+    with _metrics_lock:
+        _drain_metrics_samples_locked()
+        version = _metrics_version
+        cached = _metrics_text_cache
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    body = _render_metrics_text().encode("utf-8")
+    with _metrics_lock:
+        # Tagged with the version read before rendering: if a request landed in
+        # between, the next scrape simply renders again.
+        _metrics_text_cache = (version, body)
+    return body
+
+
+def _render_metrics_text() -> str:
     snapshot = get_metrics_json()
     lines = [
         "# HELP mosaic_requests_total Total HTTP requests processed by the Mosaic backend",
@@ -457,13 +678,22 @@ def get_metrics_text() -> str:
 
 
 def _check_db_connection() -> bool:
+    global _db_health_cache
+    now = time()
+    with _health_cache_lock:
+        cached = _db_health_cache
+    if cached is not None and now - cached[0] < _HEALTH_CHECK_TTL_SECONDS:
+        return cached[1]
     try:
         with db.engine.connect() as connection:
             connection.execute(text("SELECT 1"))
-        return True
+        ok = True
     except Exception as exc:
         logger.warning("health.db_check_failed", error=str(exc))
-        return False
+        ok = False
+    with _health_cache_lock:
+        _db_health_cache = (now, ok)
+    return ok
 
 
 def _check_cache_state() -> bool:
@@ -477,17 +707,15 @@ def _check_cache_state() -> bool:
 
 
 def _build_health_summary() -> Tuple[Dict[str, object], bool]:
-    metrics_snapshot = get_metrics_json()
+    totals = get_metrics_totals()
     uptime_s = round(_current_uptime_seconds(), 2)
-    requests_total = metrics_snapshot["requests_total"]
+    requests_total = totals.requests_total
     uptime_minutes = uptime_s / 60 if uptime_s else 0.0
     if uptime_minutes <= 0:
         req_per_min = float(requests_total)
     else:
         req_per_min = requests_total / uptime_minutes
-    error_total = (
-        metrics_snapshot["errors_total"]["4xx"] + metrics_snapshot["errors_total"]["5xx"]
-    )
+    error_total = totals.errors_4xx + totals.errors_5xx
     error_rate = error_total / requests_total if requests_total else 0.0
     db_ok = _check_db_connection()
     cache_ok = _check_cache_state()
@@ -497,28 +725,44 @@ def _build_health_summary() -> Tuple[Dict[str, object], bool]:
         "cache_ok": cache_ok,
         "req_per_min": round(req_per_min, 2),
         "error_rate": round(error_rate, 4),
-        "last_metrics_update": metrics_snapshot.get("last_updated"),
+        "last_metrics_update": _format_timestamp(totals.last_updated),
     }
     healthy = db_ok and cache_ok
     return summary, healthy
 
 
 def _metrics_logger_loop() -> None:
-    while True:
-        sleep(_METRICS_LOG_INTERVAL_SECONDS)
+    logged_version = -1
+    while not _metrics_logger_stop.wait(_METRICS_LOG_INTERVAL_SECONDS):
+        with _metrics_lock:
+            _drain_metrics_samples_locked()
+            version = _metrics_version
+        if version == logged_version:
+            continue  # nothing new since the last snapshot; skip the log line
+        logged_version = version
         snapshot = get_metrics_json()
         logger.info("metrics.snapshot", metrics=snapshot)
 
 
 def _ensure_metrics_logger_started() -> None:
     global _metrics_logger_thread
+    if _METRICS_LOG_INTERVAL_SECONDS <= 0:
+        return
     if _metrics_logger_thread and _metrics_logger_thread.is_alive():
         return
+    _metrics_logger_stop.clear()
     thread = Thread(target=_metrics_logger_loop, daemon=True, name="metrics-logger")
     thread.start()
     _metrics_logger_thread = thread
 
 
+def stop_metrics_logger(timeout: Optional[float] = None) -> None:
+    _metrics_logger_stop.set()
+    thread = _metrics_logger_thread
+    if thread and thread.is_alive():
+        thread.join(timeout)
+
+
 _ensure_metrics_logger_started()
 
 
@@ -533,25 +777,6 @@ def _format_timestamp(timestamp: Optional[float]) -> Optional[str]:
     return dt.isoformat()
 
 
-def _get_current_user() -> Optional[dict]:
-    current = getattr(g, "current_user", None)
-    return current if isinstance(current, dict) else None
-
-
-def _current_user_id() -> Optional[int]:
-    user = _get_current_user()
-    if not user:
-        return None
-    return cast(Optional[int], user.get("id"))
-
-
-def _is_admin_user() -> bool:
-    user = _get_current_user()
-    if not user:
-        return False
-    return bool(user.get("is_admin"))
-
-
 def _user_scope_clause(column: str, *, include_unassigned: bool = False) -> str:
     if include_unassigned:
         return f"({column} = ? OR {column} IS NULL)"
@@ -566,37 +791,40 @@ def build_cache_key(prefix: str, key_parts: Tuple, *, scope: Optional[CacheScope
     return _cache_build_key(prefix, _namespaced_cache_key_parts(key_parts, scope))
 
 
-@app.before_request
-def _start_request_timer() -> None:
-    g.request_start_time = _now_perf_counter()
+def _start_request_timer(method: str, endpoint: Optional[str]) -> None:
+    # perf_counter is looked up as a module global, so monkeypatching
+    # app.perf_counter in tests still takes effect.
+    clear_current_user()
+    g.request_start_time = perf_counter()
     g.request_id = secrets.token_hex(8)
-    route = request.endpoint or request.path
-    g.metrics_method = (request.method or "GET").upper()
+    path = request.path
+    route = endpoint or path
+    g.metrics_method = method.upper()
     g.metrics_endpoint = route or "<unmatched>"
     structlog.contextvars.bind_contextvars(
         request_id=g.request_id,
         route=route,
-        path=request.path,
-        method=request.method,
+        path=path,
+        method=method,
     )
 
 
 @app.after_request
 def _log_request(response: Response) -> Response:
-    start = getattr(g, "request_start_time", None)
-    duration_ms = (_now_perf_counter() - start) * 1000 if start is not None else 0.0
-    current_user = getattr(g, "current_user", None)
-    user_id = current_user.get("id") if isinstance(current_user, dict) else None
-    if user_id is not None:
-        structlog.contextvars.bind_contextvars(user_id=user_id)
-
+    # _before_request sets request_start_time and the metrics dimensions on
+    # every path, so they are read without getattr defaults; routing cannot
+    # change in between.
+    start = g.request_start_time
+    duration_ms = (perf_counter() - start) * 1000 if start is not None else 0.0
     status_code = response.status_code
-    g.metrics_endpoint = request.endpoint or getattr(g, "metrics_endpoint", request.path)
-    g.metrics_method = (request.method or "GET").upper()
-    logger.bind(
-        status_code=status_code,
-        duration_ms=round(duration_ms, 2),
-    ).info("request.completed")
+    if _REQUEST_LOG_ENABLED:
+        user_id = get_current_user_id()
+        if user_id is not None:
+            structlog.contextvars.bind_contextvars(user_id=user_id)
+        logger.bind(
+            status_code=status_code,
+            duration_ms=round(duration_ms, 2),
+        ).info("request.completed")
     _record_request_metrics(status_code, duration_ms)
     g.metrics_recorded = True
     return response
@@ -606,10 +834,11 @@ def _log_request(response: Response) -> Response:
 def _clear_request_context(exc: Optional[BaseException]) -> None:
     if exc is not None and not getattr(g, "metrics_recorded", False):
         start = getattr(g, "request_start_time", None)
-        duration_ms = (_now_perf_counter() - start) * 1000 if start is not None else 0.0
+        duration_ms = (perf_counter() - start) * 1000 if start is not None else 0.0
         status_code = getattr(exc, "code", 500) if hasattr(exc, "code") else 500
         _record_request_metrics(status_code, duration_ms, is_error=True)
         g.metrics_recorded = True
+    clear_current_user()
     structlog.contextvars.clear_contextvars()
 
 
@@ -623,6 +852,9 @@ def cache_get(prefix: str, key_parts: Tuple, *, scope: Optional[CacheScope] = No
         expires_at, value, entry_scope = entry
         if expires_at <= now:
             del _cache_storage[key]
+            scoped_keys = _cache_index.get(prefix, {}).get(entry_scope)
+            if scoped_keys is not None:
+                scoped_keys.discard(key)
             return None
         if scope and entry_scope and scope != entry_scope:
             logger.warning(
@@ -646,16 +878,37 @@ def cache_set(
     scope: Optional[CacheScope] = None,
 ) -> None:
     key = build_cache_key(prefix, key_parts, scope=scope)
+    expires_at = time() + ttl
+    stored = copy.deepcopy(value)
     with _cache_lock:
-        _cache_storage[key] = (time() + ttl, copy.deepcopy(value), scope)
+        _cache_storage[key] = (expires_at, stored, scope)
+        _cache_index.setdefault(prefix, {}).setdefault(scope, set()).add(key)
+
 
+def invalidate_cache(prefixes: Union[str, Iterable[str]], user_id: Optional[int] = None) -> None:
+    """Evict cached entries under one prefix or several, in a single lock hold.
 
-def invalidate_cache(prefix: str) -> None:
-    key_prefix = prefix + "::"
+    With ``user_id`` only that user's entries are dropped, together with admin
+    and unscoped entries, whose payloads may include the user's rows.
+    """
+    if isinstance(prefixes, str):
+        prefixes = (prefixes,)
     with _cache_lock:
-        for key in list(_cache_storage.keys()):
-            if key.startswith(key_prefix):
-                del _cache_storage[key]
+        for prefix in prefixes:
+            scopes = _cache_index.get(prefix)
+            if not scopes:
+                continue
+            if user_id is None:
+                affected = list(scopes)
+            else:
+                affected = [
+                    scope
+                    for scope in scopes
+                    if scope is None or scope.is_admin or scope.user_id == user_id
+                ]
+            for scope in affected:
+                for key in scopes.pop(scope):
+                    _cache_storage.pop(key, None)
 
 
 def _coerce_utc(dt_value: datetime, tzinfo: ZoneInfo) -> datetime:
@@ -672,7 +925,8 @@ def _compose_idempotency_token(user_id: Optional[int], key: Optional[str]) -> Op
     return f"{user_id}::{key.strip()}"
 
 
-def _idempotency_lookup(user_id: Optional[int], key: Optional[str]) -> Optional[Tuple[dict, int]]:
+def _idempotency_lookup(user_id: Optional[int], key: Optional[str]) -> Optional[Response]:
+    """Replay the stored response for a retried write, without re-encoding it."""
     token = _compose_idempotency_token(user_id, key)
     if not token:
         return None
@@ -681,26 +935,60 @@ def _idempotency_lookup(user_id: Optional[int], key: Optional[str]) -> Optional[
         entry = _idempotency_store.get(token)
         if not entry:
             return None
-        expires_at, payload, status_code = entry
+        expires_at, body, status_code = entry
         if expires_at <= now:
             del _idempotency_store[token]
             return None
-        return payload, status_code
+    return Response(body, status=status_code, mimetype="application/json")
 
 
 def _idempotency_store_response(user_id: Optional[int], key: Optional[str], payload: dict, status_code: int) -> None:
     token = _compose_idempotency_token(user_id, key)
     if not token:
         return
-    expires_at = time() + _IDEMPOTENCY_TTL_SECONDS
+    body = dumps_bytes(payload)
+    now = time()
     with _idempotency_lock:
-        _idempotency_store[token] = (expires_at, payload, status_code)
+        store = _idempotency_store
+        while store:
+            oldest = next(iter(store.values()))
+            if oldest[0] > now:
+                break
+            store.popitem(last=False)
+        store[token] = (now + _IDEMPOTENCY_TTL_SECONDS, body, status_code)
+        store.move_to_end(token)
+
+
+_TRUTHY_HEADER_VALUES = frozenset({"1", "true", "yes", "force", "overwrite"})
+_TRUTHY_QUERY_VALUES = frozenset({"1", "true", "yes"})
+
+
+def _query_truthy(value: Optional[str]) -> bool:
+    return bool(value) and value.lower() in _TRUTHY_QUERY_VALUES
 
 
 def _header_truthy(value: Optional[str]) -> bool:
     if value is None:
         return False
-    return value.strip().lower() in ("1", "true", "yes", "force", "overwrite")
+    return value.strip().lower() in _TRUTHY_HEADER_VALUES
+
+
+class _JWTSigner(NamedTuple):
+    algorithm: Any
+    key: Any
+    header_segment: bytes
+
+
+@lru_cache(maxsize=8)
+def _jwt_signer(secret: str, algorithm: str) -> _JWTSigner:
+    """Resolve the PyJWT algorithm, prepared key and encoded header once per config."""
+    algorithm_obj = jwt.get_algorithm_by_name(algorithm)
+    header = json.dumps({"alg": algorithm, "typ": "JWT"}, separators=(",", ":"), sort_keys=True)
+    return _JWTSigner(
+        algorithm=algorithm_obj,
+        key=algorithm_obj.prepare_key(secret),
+        header_segment=base64url_encode(header.encode("utf-8")),
+    )
 
 
 def _create_access_token(
@@ -722,43 +1010,63 @@ def _create_access_token(
         "is_admin": bool(is_admin),
         "display_name": (display_name or "").strip(),
     }
-    token = jwt.encode(
-        payload,
-        app.config["JWT_SECRET"],
-        algorithm=app.config.get("JWT_ALGORITHM", "HS256"),
-    )
+    signer = _jwt_signer(app.config["JWT_SECRET"], app.config.get("JWT_ALGORITHM", "HS256"))
+    payload_segment = base64url_encode(orjson.dumps(payload))
+    signing_input = signer.header_segment + b"." + payload_segment
+    signature = signer.algorithm.sign(signing_input, signer.key)
+    token = (signing_input + b"." + base64url_encode(signature)).decode("ascii")
     return token, csrf_token
 
 
 def _decode_access_token(token: str) -> dict:
-    return jwt.decode(
-        token,
-        app.config["JWT_SECRET"],
-        algorithms=[app.config.get("JWT_ALGORITHM", "HS256")],
-    )
+    secret = app.config["JWT_SECRET"]
+    algorithm = app.config.get("JWT_ALGORITHM", "HS256")
+    cache_key = hashlib.sha256(f"{secret}\0{algorithm}\0{token}".encode("utf-8")).digest()
+    now = time()
+    with _jwt_decode_cache_lock:
+        cached = _jwt_decode_cache.get(cache_key)
+        if cached is not None:
+            payload, expires_at = cached
+            if expires_at > now:
+                _jwt_decode_cache.move_to_end(cache_key)
+                return dict(payload)
+            del _jwt_decode_cache[cache_key]
+
+    payload = jwt.decode(token, _jwt_signer(secret, algorithm).key, algorithms=[algorithm])
+    token_exp = payload.get("exp")
+    if isinstance(token_exp, (int, float)):
+        # Re-validate at least once a minute even for long-lived tokens, and
+        # never serve a payload past the token's own expiry.
+        expires_at = min(float(token_exp), now + _JWT_DECODE_CACHE_TTL_SECONDS)
+        with _jwt_decode_cache_lock:
+            _jwt_decode_cache[cache_key] = (dict(payload), expires_at)
+            _jwt_decode_cache.move_to_end(cache_key)
+            while len(_jwt_decode_cache) > _JWT_DECODE_CACHE_MAX_ENTRIES:
+                _jwt_decode_cache.popitem(last=False)
+    return payload
 
 
 def _is_public_endpoint(endpoint: Optional[str]) -> bool:
     if not endpoint:
         return False
-    if endpoint.startswith("static"):
-        return True
-    public = app.config.get("PUBLIC_ENDPOINTS", set())
-    return endpoint in public
+    public = app.config.get("PUBLIC_ENDPOINTS", frozenset())
+    if not isinstance(public, frozenset):
+        public = frozenset(public)
+    return endpoint in _public_endpoint_names(public, len(app.view_functions))
 
 
-def _row_value(row, key, default=None):
-    if hasattr(row, "_mapping"):
-        return row._mapping.get(key, default)
-    if isinstance(row, dict):
-        return row.get(key, default)
-    return getattr(row, key, default)
+@lru_cache(maxsize=8)
+def _public_endpoint_names(public: frozenset, view_count: int) -> frozenset:
+    # Folds the static-prefix rule into one set so the hot path is a single
+    # membership test. Keyed on the configured set and the number of views,
+    # so swapping PUBLIC_ENDPOINTS or registering routes later rebuilds it.
+    return public | {name for name in app.view_functions if name.startswith("static")}
 
 
-def _serialize_user_row(row) -> dict:
-    username = _row_value(row, "username", "")
-    display_name = _row_value(row, "display_name", "") or username
-    created_at_value = _row_value(row, "created_at")
+def _serialize_user_row(row: Mapping[str, Any]) -> dict:
+    username = row.get("username", "")
+    display_name = row.get("display_name", "") or username
+    created_at_value = row.get("created_at")
     if isinstance(created_at_value, datetime):
         created_at_str = created_at_value.replace(
             tzinfo=created_at_value.tzinfo or timezone.utc
@@ -769,17 +1077,26 @@ def _serialize_user_row(row) -> dict:
         created_at_str = None
 
     return {
-        "id": _row_value(row, "id"),
+        "id": row.get("id"),
         "username": username,
         "display_name": display_name,
-        "is_admin": bool(_row_value(row, "is_admin", False)),
+        "is_admin": bool(row.get("is_admin", False)),
         "created_at": created_at_str,
     }
 
 
-def parse_pagination(default_limit: int = 100, max_limit: int = 500) -> Dict[str, int]:
+def parse_pagination(default_limit: int = 100, max_limit: int = 500) -> Mapping[str, int]:
+    args_get = request.args.get
+    return _parse_pagination_cached(
+        args_get("limit", default_limit), args_get("offset", 0), max_limit
+    )
+
+
+@lru_cache(maxsize=256)
+def _parse_pagination_cached(limit_raw: Any, offset_raw: Any, max_limit: int) -> Mapping[str, int]:
+    # Read-only result: the same mapping is shared by every request that sends
+    # the same query values.
     try:
-        limit_raw = request.args.get("limit", default_limit)
         limit = int(limit_raw)
         if limit <= 0:
             raise ValueError
@@ -787,7 +1104,6 @@ def parse_pagination(default_limit: int = 100, max_limit: int = 500) -> Dict[str
         raise ValidationError("limit must be a positive integer", code="invalid_query")
 
     try:
-        offset_raw = request.args.get("offset", 0)
         offset = int(offset_raw)
         if offset < 0:
             raise ValueError
@@ -795,12 +1111,15 @@ def parse_pagination(default_limit: int = 100, max_limit: int = 500) -> Dict[str
         raise ValidationError("offset must be a non-negative integer", code="invalid_query")
 
     limit = min(limit, max_limit)
-    return {"limit": limit, "offset": offset}
+    return MappingProxyType({"limit": limit, "offset": offset})
 
 
 def _build_export_filename(extension: str) -> str:
-    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
-    return f"mosaic-export-{timestamp}.{extension}"
+    now = gmtime()
+    return (
+        f"mosaic-export-{now.tm_year:04d}{now.tm_mon:02d}{now.tm_mday:02d}"
+        f"-{now.tm_hour:02d}{now.tm_min:02d}{now.tm_sec:02d}.{extension}"
+    )
 
 
 def _set_export_headers(
@@ -812,20 +1131,26 @@ def _set_export_headers(
     total_entries: int,
     total_activities: int,
 ) -> Response:
-    response.headers["Content-Disposition"] = f'attachment; filename="{_build_export_filename(extension)}"'
-    response.headers["X-Limit"] = str(limit)
-    response.headers["X-Offset"] = str(offset)
-    response.headers["X-Total-Entries"] = str(total_entries)
-    response.headers["X-Total-Activities"] = str(total_activities)
-    response.headers.setdefault("Cache-Control", "no-store")
+    headers = response.headers
+    headers.update(
+        {
+            "Content-Disposition": f'attachment; filename="{_build_export_filename(extension)}"',
+            "X-Limit": str(limit),
+            "X-Offset": str(offset),
+            "X-Total-Entries": str(total_entries),
+            "X-Total-Activities": str(total_activities),
+        }
+    )
+    headers.setdefault("Cache-Control", "no-store")
     return response
 
 
 def _fetch_export_data(limit: int, offset: int) -> tuple[list[dict], list[dict], int, int]:
-    user_id = _current_user_id()
-    is_admin = _is_admin_user()
-    if user_id is None:
+    user = get_current_user()
+    if not user or user.get("id") is None:
         raise ValidationError("Missing user context", code="unauthorized", status=401)
+    user_id = user["id"]
+    is_admin = bool(user.get("is_admin"))
 
     stats_include_unassigned = False
 
@@ -890,18 +1215,25 @@ def _fetch_export_data(limit: int, offset: int) -> tuple[list[dict], list[dict],
         )
 
         if user_id is None:
-            total_entries_stmt = "SELECT COUNT(1) FROM entries"
-            total_entries_params: Tuple = ()
-            total_activities_stmt = "SELECT COUNT(1) FROM activities"
-            total_activities_params: Tuple = ()
+            totals_stmt = """
+                SELECT
+                    (SELECT COUNT(1) FROM entries) AS total_entries,
+                    (SELECT COUNT(1) FROM activities) AS total_activities
+            """
+            totals_params: Tuple = ()
         else:
-            total_entries_stmt = f"SELECT COUNT(1) FROM entries WHERE {_user_scope_clause('user_id', include_unassigned=is_admin)}"
-            total_entries_params = (user_id,)
-            total_activities_stmt = f"SELECT COUNT(1) FROM activities WHERE {_user_scope_clause('user_id', include_unassigned=is_admin)}"
-            total_activities_params = (user_id,)
+            totals_stmt = f"""
+                SELECT
+                    (SELECT COUNT(1) FROM entries
+                      WHERE {_user_scope_clause('user_id', include_unassigned=is_admin)}) AS total_entries,
+                    (SELECT COUNT(1) FROM activities
+                      WHERE {_user_scope_clause('user_id', include_unassigned=is_admin)}) AS total_activities
+            """
+            totals_params = (user_id, user_id)
 
-        total_entries = conn.execute(total_entries_stmt, total_entries_params).scalar_one()
-        total_activities = conn.execute(total_activities_stmt, total_activities_params).scalar_one()
+        totals = conn.execute(totals_stmt, totals_params).fetchone()
+        total_entries = totals["total_entries"]
+        total_activities = totals["total_activities"]
         entries = [dict(row) for row in entries_cursor.fetchall()]
         activities = [dict(row) for row in activities_cursor.fetchall()]
         return entries, activities, int(total_entries), int(total_activities)
@@ -950,6 +1282,12 @@ def _raise_stream_error(stderr_lines: list[str], return_code: Optional[int]) ->
     raise RuntimeError(f"Unable to proxy stream (ffmpeg exited with code {return_code})")
 
 
+_STREAM_READ_BYTES = 65536
+_JPEG_SOI = b"\xff\xd8"
+_JPEG_EOI = b"\xff\xd9"
+_MJPEG_PART_HEADER = b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: "
+
+
 def stream_rtsp(url: str) -> Iterator[bytes]:
     normalized_url = _normalize_rtsp_url(url)
     command = [
@@ -992,10 +1330,13 @@ def stream_rtsp(url: str) -> Iterator[bytes]:
         stderr_thread.start()
 
     buffer = bytearray()
+    # where to resume looking for the end-of-image marker, so each read only
+    # scans the new bytes instead of the whole partial frame again
+    scan_from = 2
     frame_emitted = False
     try:
         while True:
-            chunk = process.stdout.read(4096)
+            chunk = process.stdout.read(_STREAM_READ_BYTES)
             if not chunk:
                 if process.poll() is None:
                     continue
@@ -1003,31 +1344,32 @@ def stream_rtsp(url: str) -> Iterator[bytes]:
                     _raise_stream_error(stderr_lines, process.returncode)
                 break
 
-            buffer.extend(chunk)
+            buffer += chunk
             while True:
-                start_idx = buffer.find(b"\xff\xd8")
-                if start_idx == -1:
-                    if len(buffer) > 65536:
-                        buffer.clear()
-                    break
-                if start_idx > 0:
+                if not buffer.startswith(_JPEG_SOI):
+                    start_idx = buffer.find(_JPEG_SOI)
+                    if start_idx == -1:
+                        if len(buffer) > 65536:
+                            buffer.clear()
+                        break
                     del buffer[:start_idx]
-                end_idx = buffer.find(b"\xff\xd9")
+                    scan_from = 2
+                end_idx = buffer.find(_JPEG_EOI, scan_from)
                 if end_idx == -1:
+                    scan_from = max(2, len(buffer) - 1)
                     break
 
-                frame = bytes(buffer[: end_idx + 2])
-                del buffer[: end_idx + 2]
+                frame_end = end_idx + 2
+                # one copy per frame: the part is joined straight from a view
+                # over the read buffer
+                with memoryview(buffer) as view:
+                    part = b"".join(
+                        (_MJPEG_PART_HEADER, str(frame_end).encode(), b"\r\n\r\n", view[:frame_end], b"\r\n")
+                    )
+                del buffer[:frame_end]
+                scan_from = 2
                 frame_emitted = True
-
-                headers = (
-                    b"--frame\r\n"
-                    b"Content-Type: image/jpeg\r\n"
-                    b"Content-Length: "
-                    + str(len(frame)).encode()
-                    + b"\r\n\r\n"
-                )
-                yield headers + frame + b"\r\n"
+                yield part
     except GeneratorExit:
         raise
     finally:
@@ -1072,7 +1414,7 @@ def home():
 def metrics():
     if (request.args.get("format") or "").lower() == "json":
         return jsonify(get_metrics_json())
-    text_body = get_metrics_text()
+    text_body = get_metrics_text_bytes()
     return Response(text_body, mimetype="text/plain; version=0.0.4; charset=utf-8")
 
 
@@ -1101,12 +1443,11 @@ def health_command():
 
 @app.post("/register")
 def register():
-    limits = app.config["RATE_LIMITS"]["register"]
-    limited = rate_limit("register", limits["limit"], limits["window"])
+    limited = enforce_rate_limit("register")
     if limited:
         return limited
 
-    data = request.get_json() or {}
+    data = parse_json_body() or {}
     payload = validate_register_payload(data)
     username = payload["username"]
     password_hash = generate_password_hash(payload["password"])
@@ -1134,6 +1475,7 @@ def register():
         )
         return error_response("conflict", "Username already exists", 409)
 
+    _bump_users_version()
     log_event(
         "auth.register",
         "User registered",
@@ -1145,12 +1487,11 @@ def register():
 
 @app.post("/login")
 def login():
-    limits = app.config["RATE_LIMITS"]["login"]
-    limited = rate_limit("login", limits["limit"], limits["window"])
+    limited = enforce_rate_limit("login")
     if limited:
         return limited
 
-    data = request.get_json() or {}
+    data = parse_json_body() or {}
     payload = validate_login_payload(data)
 
     conn = get_db_connection()
@@ -1232,7 +1573,7 @@ def login():
 @app.get("/user")
 @jwt_required()
 def get_current_user_profile():
-    current_user = getattr(g, "current_user", None)
+    current_user = get_current_user()
     if not current_user:
         return error_response("unauthorized", "Unauthorized", 401)
     user_id = current_user["id"]
@@ -1261,7 +1602,7 @@ def get_current_user_profile():
 @app.patch("/user")
 @jwt_required()
 def update_current_user():
-    current_user = getattr(g, "current_user", None)
+    current_user = get_current_user()
     if not current_user:
         return error_response("unauthorized", "Unauthorized", 401)
 
@@ -1301,6 +1642,7 @@ def update_current_user():
             (current_user["id"],),
         ).fetchone()
 
+    _bump_users_version()
     if not row:
         return error_response("not_found", "User not found", 404)
 
@@ -1315,7 +1657,7 @@ def update_current_user():
 @app.delete("/user")
 @jwt_required()
 def delete_current_user():
-    current_user = getattr(g, "current_user", None)
+    current_user = get_current_user()
     if not current_user:
         return error_response("unauthorized", "Unauthorized", 401)
     user_id = current_user["id"]
@@ -1325,16 +1667,40 @@ def delete_current_user():
     if cur.rowcount == 0:
         return error_response("not_found", "User not found", 404)
 
-    invalidate_cache("today")
-    invalidate_cache("stats")
+    _bump_users_version()
+    invalidate_cache(("today", "stats"))
 
     return jsonify({"message": "Account deleted"}), 200
 
 
+_USERS_ETAG_BOOT_ID = secrets.token_hex(4)
+_USERS_ETAG_MAX_AGE_SECONDS = 60
+_users_version = 0
+
+
+def _bump_users_version() -> None:
+    global _users_version
+    _users_version += 1
+
+
+def _users_etag() -> str:
+    # The version only sees writes made through this process, so the tag also
+    # carries a per-process id (restarts and other workers never match) and a
+    # minute bucket that bounds staleness from out-of-band edits (manage.py).
+    bucket = int(time() // _USERS_ETAG_MAX_AGE_SECONDS)
+    return f"users-{_USERS_ETAG_BOOT_ID}-{_users_version}-{bucket}"
+
+
 @app.get("/users")
 @jwt_required()
 @require_admin
 def list_users():
+    etag = _users_etag()
+    if request.if_none_match.contains_weak(etag):
+        not_modified = Response(status=304)
+        not_modified.set_etag(etag, weak=True)
+        return not_modified
+
     conn = get_db_connection()
     try:
         rows = conn.execute(
@@ -1351,14 +1717,17 @@ def list_users():
         ).fetchall()
     finally:
         conn.close()
-    return jsonify([_serialize_user_row(row) for row in rows])
+    response = jsonify([_serialize_user_row(row) for row in rows])
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "private, max-age=5"
+    return response
 
 
-@app.delete("/users/<int:user_id>")
+@app.delete("/users/<id:user_id>")
 @jwt_required()
 @require_admin
 def admin_delete_user(user_id: int):
-    current_user = getattr(g, "current_user", None)
+    current_user = get_current_user()
     if current_user and current_user.get("id") == user_id:
         return error_response("invalid_operation", "Admins cannot delete their own account", 400)
 
@@ -1368,70 +1737,88 @@ def admin_delete_user(user_id: int):
     if cur.rowcount == 0:
         return error_response("not_found", "User not found", 404)
 
-    invalidate_cache("today")
-    invalidate_cache("stats")
+    _bump_users_version()
+    invalidate_cache(("today", "stats"))
     return jsonify({"message": f"User {user_id} deleted"}), 200
 
 
-@app.before_request
-def _enforce_api_key():
-    auth_result = require_api_key()
-    if auth_result:
-        return auth_result
-
-
-@app.before_request
-def _enforce_jwt_authentication():
-    if request.method == "OPTIONS":  # preflight requests are exempt
+def _enforce_jwt_authentication(method: str, endpoint: Optional[str]):
+    if method == "OPTIONS":  # preflight requests are exempt
         return None
 
-    endpoint = request.endpoint
     if _is_public_endpoint(endpoint):
         return None
 
     auth_header = request.headers.get("Authorization", "")
-    if not auth_header.startswith("Bearer "):
-        return error_response("unauthorized", "Missing or invalid access token", 401)
+    if auth_header[:7] != "Bearer ":
+        return static_error_response("unauthorized", "Missing or invalid access token", 401)
 
-    token = auth_header.split(" ", 1)[1].strip()
+    token = auth_header[7:].strip()
     if not token:
-        return error_response("unauthorized", "Missing or invalid access token", 401)
+        return static_error_response("unauthorized", "Missing or invalid access token", 401)
 
     try:
         payload = _decode_access_token(token)
     except jwt.ExpiredSignatureError:
-        return error_response("token_expired", "Access token expired", 401)
+        return static_error_response("token_expired", "Access token expired", 401)
     except jwt.InvalidTokenError:
-        return error_response("unauthorized", "Invalid access token", 401)
+        return static_error_response("unauthorized", "Invalid access token", 401)
 
     user_id_raw = payload.get("sub")
     if user_id_raw is None:
-        return error_response("unauthorized", "Invalid access token", 401)
+        return static_error_response("unauthorized", "Invalid access token", 401)
     try:
         user_id = int(user_id_raw)
     except (TypeError, ValueError):
-        return error_response("unauthorized", "Invalid access token", 401)
+        return static_error_response("unauthorized", "Invalid access token", 401)
 
     csrf_claim = payload.get("csrf")
     if not csrf_claim:
-        return error_response("invalid_csrf", "Missing CSRF token claim", 403)
+        return static_error_response("invalid_csrf", "Missing CSRF token claim", 403)
 
-    g.current_user = {
-        "id": user_id,
-        "username": payload.get("username"),
-        "is_admin": bool(payload.get("is_admin", False)),
-        "display_name": payload.get("display_name") or "",
-    }
-    g.csrf_token = csrf_claim
+    set_current_user(
+        {
+            "id": user_id,
+            "username": payload.get("username"),
+            "is_admin": bool(payload.get("is_admin", False)),
+            "display_name": payload.get("display_name") or "",
+        },
+        csrf_claim,
+    )
 
-    if request.method not in SAFE_METHODS:
+    if method not in SAFE_METHODS:
         csrf_header = request.headers.get("X-CSRF-Token")
         if not csrf_header or csrf_header != csrf_claim:
-            return error_response("invalid_csrf", "Missing or invalid CSRF token", 403)
+            return static_error_response("invalid_csrf", "Missing or invalid CSRF token", 403)
 
     return None
 
 
+@app.before_request
+def _before_request():
+    """The only before_request hook: preflight, request context, API key, JWT.
+
+    One callable instead of four keeps Flask's dispatch to a single frame,
+    and the method and endpoint are read from the request proxy once. The
+    timer starts before the auth checks so rejected requests still carry a
+    request id and are counted in the metrics.
+    """
+    method = request.method
+    endpoint = request.endpoint
+    preflight = _answer_cors_preflight(method)
+    if preflight is not None:
+        # Untimed, but _log_request still reads these as plain attributes.
+        g.request_start_time = None
+        g.metrics_method = method
+        g.metrics_endpoint = endpoint or "<unmatched>"
+        return preflight
+    _start_request_timer(method, endpoint)
+    auth_result = require_api_key()
+    if auth_result:
+        return auth_result
+    return _enforce_jwt_authentication(method, endpoint)
+
+
 @app.errorhandler(ValidationError)
 def handle_validation(error: ValidationError):
     logger.bind(status_code=error.status, error_code=error.code).warning(
@@ -1446,8 +1833,8 @@ def handle_validation(error: ValidationError):
 def handle_http_exception(exc: HTTPException):
     status = exc.code or 500
     message = exc.description or exc.name or "HTTP error"
-    code = ERROR_CODE_BY_STATUS.get(status)
-    if code is None:
+    code = _HTTP_EXCEPTION_CODES.get(status)
+    if code is None:  # redirects raised as exceptions, non-standard codes
         code = "internal_error" if status >= 500 else "bad_request"
     log_method = logger.error if status >= 500 else logger.warning
     log_method(
@@ -1482,6 +1869,8 @@ def stream_proxy():
             stream_with_context(stream_rtsp(rtsp_url)),
             mimetype="multipart/x-mixed-replace; boundary=frame",
         )
+        # frames are already bytes; hand the generator to the server as-is
+        response.direct_passthrough = True
         response.headers["Cache-Control"] = "no-store"
         return response
     except ValidationError as exc:
@@ -1516,7 +1905,7 @@ def backup_status():
 @app.post("/backup/run")
 @jwt_required()
 def backup_run():
-    operator_id = _current_user_id()
+    operator_id = get_current_user_id()
     try:
         result = backup_manager.create_backup(initiated_by="api")
     except Exception as exc:
@@ -1541,7 +1930,7 @@ def backup_run():
 @app.post("/backup/toggle")
 @jwt_required()
 def backup_toggle():
-    operator_id = _current_user_id()
+    operator_id = get_current_user_id()
     payload = request.get_json(silent=True) or {}
     enabled = payload.get("enabled")
     interval = payload.get("interval_minutes")
@@ -1590,29 +1979,104 @@ def backup_download(filename: str):
     log_event(
         "backup.download",
         "Backup downloaded",
-        user_id=_current_user_id(),
+        user_id=get_current_user_id(),
         context={"filename": filename},
     )
+    accel_prefix = app.config.get("BACKUP_ACCEL_REDIRECT_PREFIX")
+    if accel_prefix:
+        response = Response(status=200, mimetype="application/zip")
+        response.headers["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/{quote(path.name)}"
+        response.headers["Content-Disposition"] = f'attachment; filename="{path.name}"'
+        return response
     return send_file(path, as_attachment=True, download_name=path.name)
 
 
+_EXPORT_STREAM_BATCH_ROWS = 200
+_EXPORT_ENTRY_CSV_FIELDS = (
+    "entry_id",
+    "date",
+    "activity",
+    "entry_description",
+    "value",
+    "note",
+    "activity_category",
+    "activity_goal",
+    "activity_type",
+)
+_EXPORT_ACTIVITY_CSV_FIELDS = (
+    "activity_id",
+    "name",
+    "category",
+    "activity_type",
+    "goal",
+    "activity_description",
+    "active",
+    "frequency_per_day",
+    "frequency_per_week",
+    "deactivated_at",
+)
+
+
+def _iter_json_array_items(rows: List[dict]) -> Iterator[bytes]:
+    # Encodes a batch at a time and strips the brackets, so the body is never
+    # held in memory as one string.
+    for start in range(0, len(rows), _EXPORT_STREAM_BATCH_ROWS):
+        chunk = dumps_bytes(rows[start : start + _EXPORT_STREAM_BATCH_ROWS])[1:-1]
+        yield chunk if start == 0 else b"," + chunk
+
+
+def _stream_export_json(entries: List[dict], activities: List[dict], meta: dict) -> Iterator[bytes]:
+    # Keys in the same sorted order jsonify would produce.
+    yield b'{"activities":['
+    yield from _iter_json_array_items(activities)
+    yield b'],"entries":['
+    yield from _iter_json_array_items(entries)
+    yield b'],"meta":' + dumps_bytes(meta) + b"}"
+
+
+def _stream_export_csv(entries: List[dict], activities: List[dict]) -> Iterator[bytes]:
+    # The writer encodes straight into a byte buffer, so chunks leave as UTF-8
+    # bytes rather than str that the WSGI layer would have to encode again.
+    buffer = io.BytesIO()
+    writer = csv.writer(io.TextIOWrapper(buffer, encoding="utf-8", newline="", write_through=True))
+    sections = (
+        ("entries", entries, _EXPORT_ENTRY_CSV_FIELDS),
+        ("activities", activities, _EXPORT_ACTIVITY_CSV_FIELDS),
+    )
+    for index, (dataset, rows, fields) in enumerate(sections):
+        if index:
+            writer.writerow([])
+        writer.writerow(("dataset",) + fields)
+        prefix = (dataset,)
+        for start in range(0, len(rows), _EXPORT_STREAM_BATCH_ROWS):
+            writer.writerows(
+                prefix + tuple(map(row.get, fields))
+                for row in rows[start : start + _EXPORT_STREAM_BATCH_ROWS]
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    tail = buffer.getvalue()
+    if tail:
+        yield tail
+
+
 @app.get("/export/json")
 @jwt_required()
 def export_json():
     pagination = parse_pagination(default_limit=500, max_limit=2000)
     limit = pagination["limit"]
     offset = pagination["offset"]
+    # Rows are fetched up front (bounded by max_limit) so the DB connection is
+    # released before a slow client drains the streamed body.
     entries, activities, total_entries, total_activities = _fetch_export_data(limit, offset)
 
-    payload = {
-        "entries": entries,
-        "activities": activities,
-        "meta": {
-            "entries": {"limit": limit, "offset": offset, "total": total_entries},
-            "activities": {"limit": limit, "offset": offset, "total": total_activities},
-        },
+    meta = {
+        "entries": {"limit": limit, "offset": offset, "total": total_entries},
+        "activities": {"limit": limit, "offset": offset, "total": total_activities},
     }
-    response = jsonify(payload)
+    response = Response(_stream_export_json(entries, activities, meta), mimetype="application/json")
+    response.headers["X-Accel-Buffering"] = "no"
     return _set_export_headers(
         response,
         "json",
@@ -1631,74 +2095,8 @@ def export_csv():
     offset = pagination["offset"]
     entries, activities, total_entries, total_activities = _fetch_export_data(limit, offset)
 
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    writer.writerow(
-        [
-            "dataset",
-            "entry_id",
-            "date",
-            "activity",
-            "entry_description",
-            "value",
-            "note",
-            "activity_category",
-            "activity_goal",
-            "activity_type",
-        ]
-    )
-    for entry in entries:
-        writer.writerow(
-            [
-                "entries",
-                entry.get("entry_id"),
-                entry.get("date"),
-                entry.get("activity"),
-                entry.get("entry_description"),
-                entry.get("value"),
-                entry.get("note"),
-                entry.get("activity_category"),
-                entry.get("activity_goal"),
-                entry.get("activity_type"),
-            ]
-        )
-
-    writer.writerow([])
-    writer.writerow(
-        [
-            "dataset",
-            "activity_id",
-            "name",
-            "category",
-            "activity_type",
-            "goal",
-            "activity_description",
-            "active",
-            "frequency_per_day",
-            "frequency_per_week",
-            "deactivated_at",
-        ]
-    )
-    for activity in activities:
-        writer.writerow(
-            [
-                "activities",
-                activity.get("activity_id"),
-                activity.get("name"),
-                activity.get("category"),
-                activity.get("activity_type"),
-                activity.get("goal"),
-                activity.get("activity_description"),
-                activity.get("active"),
-                activity.get("frequency_per_day"),
-                activity.get("frequency_per_week"),
-                activity.get("deactivated_at"),
-            ]
-        )
-
-    csv_data = output.getvalue()
-    response = Response(csv_data, mimetype="text/csv")
+    response = Response(_stream_export_csv(entries, activities), mimetype="text/csv")
+    response.headers["X-Accel-Buffering"] = "no"
     return _set_export_headers(
         response,
         "csv",
@@ -1709,17 +2107,43 @@ def export_csv():
     )
 
 
-@app.get("/entries")
-def get_entries():
-    user_id = _current_user_id()
-    is_admin = _is_admin_user()
-    if user_id is None:
-        return error_response("unauthorized", "Missing user context", 401)
+_ALL_ACTIVITIES_MARKERS = frozenset({"all", "all activities", "all_activities"})
+_ALL_CATEGORIES_MARKERS = frozenset({"all", "all categories", "all_categories"})
+
+
+@lru_cache(maxsize=256)
+def _normalize_entry_filter(value: Optional[str], all_markers: frozenset) -> Optional[str]:
+    candidate = (value or "").strip()
+    if not candidate or candidate.lower() in all_markers:
+        return None
+    return candidate
+
 
-    start_date = (request.args.get("start_date") or "").strip() or None
-    end_date = (request.args.get("end_date") or "").strip() or None
-    activity_filter_raw = request.args.get("activity") or ""
-    category_filter_raw = request.args.get("category") or ""
+def _encode_entries_cursor(date: str, activity: str, entry_id: int) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps([date, activity, entry_id])).decode("ascii")
+
+
+def _decode_entries_cursor(raw: Optional[str]) -> Optional[Tuple[str, str, int]]:
+    """Decode the opaque ``?cursor=`` issued in ``X-Next-Cursor`` by GET /entries."""
+    if not raw:
+        return None
+    try:
+        date, activity, entry_id = orjson.loads(base64.urlsafe_b64decode(raw.encode("ascii")))
+    except (ValueError, TypeError, orjson.JSONDecodeError):
+        raise ValidationError("Invalid cursor", code="invalid_query")
+    if not isinstance(date, str) or not isinstance(activity, str) or type(entry_id) is not int:
+        raise ValidationError("Invalid cursor", code="invalid_query")
+    return date, activity, entry_id
+
+
+@app.get("/entries")
+@require_user
+def get_entries(*, user_id: int, is_admin: bool):
+    args_get = request.args.get
+    start_date = (args_get("start_date") or "").strip() or None
+    end_date = (args_get("end_date") or "").strip() or None
+    activity_filter = _normalize_entry_filter(args_get("activity"), _ALL_ACTIVITIES_MARKERS)
+    category_filter = _normalize_entry_filter(args_get("category"), _ALL_CATEGORIES_MARKERS)
 
     try:
         if start_date:
@@ -1728,17 +2152,7 @@ def get_entries():
             datetime.strptime(end_date, "%Y-%m-%d")
     except ValueError:
         return error_response("invalid_query", "Invalid date filter", 400)
-
-    def normalize_filter(value, all_markers):
-        candidate = value.strip()
-        if not candidate:
-            return None
-        if candidate.lower() in all_markers:
-            return None
-        return candidate
-
-    activity_filter = normalize_filter(activity_filter_raw, {"all", "all activities", "all_activities"})
-    category_filter = normalize_filter(category_filter_raw, {"all", "all categories", "all_categories"})
+    cursor = _decode_entries_cursor(args_get("cursor"))
 
     conn = get_db_connection()
     try:
@@ -1760,6 +2174,18 @@ def get_entries():
             clauses.append(_user_scope_clause("e.user_id", include_unassigned=is_admin))
             params.append(user_id)
 
+        pagination = parse_pagination()
+        offset = pagination["offset"]
+        if cursor is not None:
+            # keyset seek: rows strictly after the cursor in the listing order,
+            # so deep pages cost an index range scan instead of a skipped OFFSET
+            clauses.append(
+                "(e.date < ? OR (e.date = ? AND (e.activity > ? OR (e.activity = ? AND e.id > ?))))"
+            )
+            cursor_date, cursor_activity, cursor_id = cursor
+            params.extend([cursor_date, cursor_date, cursor_activity, cursor_activity, cursor_id])
+            offset = 0
+
         where_sql = ""
         if clauses:
             where_sql = "WHERE " + " AND ".join(clauses)
@@ -1775,14 +2201,17 @@ def get_entries():
               ON a.name = e.activity
              AND (a.user_id = e.user_id OR a.user_id IS NULL)
             {where_sql}
-            ORDER BY e.date DESC, e.activity ASC
+            ORDER BY e.date DESC, e.activity ASC, e.id ASC
+            LIMIT ? OFFSET ?
         """
-        pagination = parse_pagination()
-        query += " LIMIT ? OFFSET ?"
-        params.extend([pagination["limit"], pagination["offset"]])
+        params.extend([pagination["limit"], offset])
         result = conn.execute(query, params)
         entries = [dict(row) for row in result.fetchall()]
-        return jsonify(entries)
+        response = jsonify(entries)
+        if len(entries) == pagination["limit"]:
+            last = entries[-1]
+            response.headers["X-Next-Cursor"] = _encode_entries_cursor(last["date"], last["activity"], last["id"])
+        return response
     except SQLAlchemyError as exc:
         return error_response("database_error", str(exc), 500)
     finally:
@@ -1790,23 +2219,18 @@ def get_entries():
 
 
 @app.post("/add_entry")
-def add_entry():
-    user_id = _current_user_id()
-    if user_id is None:
-        return error_response("unauthorized", "Missing user context", 401)
-
-    limits = app.config["RATE_LIMITS"]["add_entry"]
-    limited = rate_limit("add_entry", limits["limit"], limits["window"])
+@require_user
+def add_entry(*, user_id: int, is_admin: bool):
+    limited = enforce_rate_limit("add_entry")
     if limited:
         return limited
 
     idempotency_key = request.headers.get("X-Idempotency-Key")
     cached_response = _idempotency_lookup(user_id, idempotency_key)
-    if cached_response:
-        payload, status_code = cached_response
-        return jsonify(payload), status_code
+    if cached_response is not None:
+        return cached_response
 
-    data = request.get_json() or {}
+    data = parse_json_body() or {}
     payload = validate_entry_payload(data)
     date = payload["date"]
     activity = payload["activity"]
@@ -1973,22 +2397,16 @@ def add_entry():
     except SQLAlchemyError as exc:
         return error_response("database_error", str(exc), 500)
     else:
-        invalidate_cache("today")
-        invalidate_cache("stats")
+        invalidate_cache(("today", "stats"))
         if idempotency_key:
             _idempotency_store_response(user_id, idempotency_key, response_payload, status_code)
         return response
 
 
-@app.delete("/entries/<int:entry_id>")
-def delete_entry(entry_id):
-    user_id = _current_user_id()
-    is_admin = _is_admin_user()
-    if user_id is None:
-        return error_response("unauthorized", "Missing user context", 401)
-
-    limits = app.config["RATE_LIMITS"]["delete_entry"]
-    limited = rate_limit("delete_entry", limits["limit"], limits["window"])
+@app.delete("/entries/<id:entry_id>")
+@require_user
+def delete_entry(entry_id, *, user_id: int, is_admin: bool):
+    limited = enforce_rate_limit("delete_entry")
     if limited:
         return limited
 
@@ -2010,8 +2428,7 @@ def delete_entry(entry_id):
                 context={"entry_id": entry_id, "as_admin": is_admin},
             )
             return error_response("not_found", "Záznam nenalezen", 404)
-        invalidate_cache("today")
-        invalidate_cache("stats")
+        invalidate_cache(("today", "stats"))
         log_event(
             "entry.delete",
             "Entry deleted",
@@ -2024,13 +2441,9 @@ def delete_entry(entry_id):
 
 
 @app.get("/activities")
-def get_activities():
-    user_id = _current_user_id()
-    is_admin = _is_admin_user()
-    if user_id is None:
-        return error_response("unauthorized", "Missing user context", 401)
-
-    show_all = request.args.get("all", "false").lower() in ("1", "true", "yes")
+@require_user
+def get_activities(*, user_id: int, is_admin: bool):
+    show_all = _query_truthy(request.args.get("all"))
     conn = get_db_connection()
     try:
         pagination = parse_pagination()
@@ -2069,25 +2482,20 @@ def get_activities():
 
 
 @app.post("/add_activity")
-def add_activity():
-    user_id = _current_user_id()
-    if user_id is None:
-        return error_response("unauthorized", "Missing user context", 401)
-
-    limits = app.config["RATE_LIMITS"]["add_activity"]
-    limited = rate_limit("add_activity", limits["limit"], limits["window"])
+@require_user
+def add_activity(*, user_id: int, is_admin: bool):
+    limited = enforce_rate_limit("add_activity")
     if limited:
         return limited
 
     idempotency_key = request.headers.get("X-Idempotency-Key")
     cached_response = _idempotency_lookup(user_id, idempotency_key)
-    if cached_response:
-        payload, status_code = cached_response
-        return jsonify(payload), status_code
+    if cached_response is not None:
+        return cached_response
 
     overwrite_requested = _header_truthy(request.headers.get("X-Overwrite-Existing"))
 
-    data = request.get_json() or {}
+    data = parse_json_body() or {}
     payload = validate_activity_create_payload(data)
     name = payload["name"]
     category = payload["category"]
@@ -2126,8 +2534,7 @@ def add_activity():
                     user_id,
                 ),
             )
-        invalidate_cache("today")
-        invalidate_cache("stats")
+        invalidate_cache(("today", "stats"))
         log_event(
             "activity.create",
             "Activity created",
@@ -2162,8 +2569,7 @@ def add_activity():
                     ),
                 )
             if cur.rowcount > 0:
-                invalidate_cache("today")
-                invalidate_cache("stats")
+                invalidate_cache(("today", "stats"))
                 response_payload = {"message": "Kategorie aktualizována", "overwrite": True}
                 if idempotency_key:
                     _idempotency_store_response(user_id, idempotency_key, response_payload, 200)
@@ -2184,19 +2590,14 @@ def add_activity():
         )
 
 
-@app.put("/activities/<int:activity_id>")
-def update_activity(activity_id):
-    user_id = _current_user_id()
-    is_admin = _is_admin_user()
-    if user_id is None:
-        return error_response("unauthorized", "Missing user context", 401)
-
-    limits = app.config["RATE_LIMITS"]["update_activity"]
-    limited = rate_limit("update_activity", limits["limit"], limits["window"])
+@app.put("/activities/<id:activity_id>")
+@require_user
+def update_activity(activity_id, *, user_id: int, is_admin: bool):
+    limited = enforce_rate_limit("update_activity")
     if limited:
         return limited
 
-    data = request.get_json() or {}
+    data = parse_json_body() or {}
     payload = validate_activity_update_payload(data)
 
     with db_transaction() as conn:
@@ -2260,20 +2661,14 @@ def update_activity(activity_id):
                 entry_params,
             )
 
-    invalidate_cache("today")
-    invalidate_cache("stats")
+    invalidate_cache(("today", "stats"))
     return jsonify({"message": "Aktivita aktualizována"}), 200
 
 
-@app.patch("/activities/<int:activity_id>/deactivate")
-def deactivate_activity(activity_id):
-    user_id = _current_user_id()
-    is_admin = _is_admin_user()
-    if user_id is None:
-        return error_response("unauthorized", "Missing user context", 401)
-
-    limits = app.config["RATE_LIMITS"]["activity_status"]
-    limited = rate_limit("activities_deactivate", limits["limit"], limits["window"])
+@app.patch("/activities/<id:activity_id>/deactivate")
+@require_user
+def deactivate_activity(activity_id, *, user_id: int, is_admin: bool):
+    limited = enforce_rate_limit("activity_status", "activities_deactivate")
     if limited:
         return limited
     deactivation_date = datetime.now().strftime("%Y-%m-%d")
@@ -2290,20 +2685,14 @@ def deactivate_activity(activity_id):
         )
         if cur.rowcount == 0:
             return error_response("not_found", "Aktivita nenalezena", 404)
-    invalidate_cache("today")
-    invalidate_cache("stats")
+    invalidate_cache(("today", "stats"))
     return jsonify({"message": "Aktivita deaktivována"}), 200
 
 
-@app.patch("/activities/<int:activity_id>/activate")
-def activate_activity(activity_id):
-    user_id = _current_user_id()
-    is_admin = _is_admin_user()
-    if user_id is None:
-        return error_response("unauthorized", "Missing user context", 401)
-
-    limits = app.config["RATE_LIMITS"]["activity_status"]
-    limited = rate_limit("activities_activate", limits["limit"], limits["window"])
+@app.patch("/activities/<id:activity_id>/activate")
+@require_user
+def activate_activity(activity_id, *, user_id: int, is_admin: bool):
+    limited = enforce_rate_limit("activity_status", "activities_activate")
     if limited:
         return limited
 
@@ -2319,13 +2708,13 @@ def activate_activity(activity_id):
         )
         if cur.rowcount == 0:
             return error_response("not_found", "Aktivita nenalezena", 404)
-    invalidate_cache("today")
-    invalidate_cache("stats")
+    invalidate_cache(("today", "stats"))
     return jsonify({"message": "Aktivita aktivována"}), 200
 
 
 @app.get("/stats/progress")
-def get_progress_stats():
+@require_user
+def get_progress_stats(*, user_id: int, is_admin: bool):
     date_raw = request.args.get("date")
     if date_raw:
         try:
@@ -2335,11 +2724,6 @@ def get_progress_stats():
     else:
         target_date = datetime.now().date()
 
-    user_id = _current_user_id()
-    is_admin = _is_admin_user()
-    if user_id is None:
-        return error_response("unauthorized", "Missing user context", 401)
-
     cache_scope = CacheScope(user_id, is_admin)
     cache_key_parts = ("dashboard", target_date.isoformat())
     cached = cache_get("stats", cache_key_parts, scope=cache_scope)
@@ -2605,19 +2989,36 @@ def get_progress_stats():
 
 
 @app.get("/today")
-def get_today():
-    user_id = _current_user_id()
-    is_admin = _is_admin_user()
-    if user_id is None:
-        return error_response("unauthorized", "Missing user context", 401)
-
+@require_user
+def get_today(*, user_id: int, is_admin: bool):
     date = request.args.get("date") or datetime.now().strftime("%Y-%m-%d")
     pagination = parse_pagination(default_limit=200)
     cache_scope = CacheScope(user_id, is_admin)
     cache_key_parts = (date, pagination["limit"], pagination["offset"])
-    cached = cache_get("today", cache_key_parts, scope=cache_scope)
-    if cached is not None:
-        return jsonify(cached)
+    flight_key = build_cache_key("today", cache_key_parts, scope=cache_scope)
+    while True:
+        cached = cache_get("today", cache_key_parts, scope=cache_scope)
+        if cached is not None:
+            return Response(cached, mimetype="application/json")
+        with _today_inflight_lock:
+            inflight = _today_inflight.get(flight_key)
+            if inflight is None:
+                inflight = _today_inflight[flight_key] = Event()
+                break
+        # another request is already building this payload; share its result
+        # (or take over if it failed and left nothing in the cache)
+        inflight.wait(_TODAY_INFLIGHT_WAIT_SECONDS)
+    try:
+        payload = dumps_bytes(_query_today_rows(date, pagination, user_id=user_id, is_admin=is_admin))
+        cache_set("today", cache_key_parts, payload, TODAY_CACHE_TTL, scope=cache_scope)
+    finally:
+        with _today_inflight_lock:
+            _today_inflight.pop(flight_key, None)
+        inflight.set()
+    return Response(payload, mimetype="application/json")
+
+
+def _query_today_rows(date: str, pagination: Mapping[str, int], *, user_id: int, is_admin: bool) -> List[dict]:
     conn = get_db_connection()
     try:
         join_clause = "LEFT JOIN entries e ON e.activity = a.name AND e.date = ?"
@@ -2671,19 +3072,13 @@ def get_today():
             data.append(item)
     finally:
         conn.close()
-    cache_set("today", cache_key_parts, data, TODAY_CACHE_TTL, scope=cache_scope)
-    return jsonify(data)
-
+    return data
 
-@app.delete("/activities/<int:activity_id>")
-def delete_activity(activity_id):
-    user_id = _current_user_id()
-    is_admin = _is_admin_user()
-    if user_id is None:
-        return error_response("unauthorized", "Missing user context", 401)
 
-    limits = app.config["RATE_LIMITS"]["delete_activity"]
-    limited = rate_limit("delete_activity", limits["limit"], limits["window"])
+@app.delete("/activities/<id:activity_id>")
+@require_user
+def delete_activity(activity_id, *, user_id: int, is_admin: bool):
+    limited = enforce_rate_limit("delete_activity")
     if limited:
         return limited
 
@@ -2705,24 +3100,18 @@ def delete_activity(activity_id):
             delete_query += " AND user_id = ?"
             delete_params.append(user_id)
         conn.execute(delete_query, delete_params)
-    invalidate_cache("today")
-    invalidate_cache("stats")
+    invalidate_cache(("today", "stats"))
     return jsonify({"message": "Aktivita smazána"}), 200
 
 
 @app.post("/finalize_day")
-def finalize_day():
-    user_id = _current_user_id()
-    is_admin = _is_admin_user()
-    if user_id is None:
-        return error_response("unauthorized", "Missing user context", 401)
-
-    limits = app.config["RATE_LIMITS"]["finalize_day"]
-    limited = rate_limit("finalize_day", limits["limit"], limits["window"])
+@require_user
+def finalize_day(*, user_id: int, is_admin: bool):
+    limited = enforce_rate_limit("finalize_day")
     if limited:
         return limited
 
-    payload = validate_finalize_day_payload(request.get_json() or {})
+    payload = validate_finalize_day_payload(parse_json_body() or {})
     date = payload["date"]
 
     with db_transaction() as conn:
@@ -2768,23 +3157,18 @@ def finalize_day():
                     (date, a["name"], a["description"], a["category"], a["goal"], activity_type_value, user_id),
                 )
                 created += 1
-    invalidate_cache("today")
-    invalidate_cache("stats")
+    invalidate_cache(("today", "stats"))
     return jsonify({"message": f"{created} missing entries added for {date}"}), 200
 
 
 @app.post("/ingest/wearable/batch")
-def ingest_wearable_batch():
-    user_id = _current_user_id()
-    if user_id is None:
-        return error_response("unauthorized", "Missing user context", 401)
-
-    limits = app.config["RATE_LIMITS"].get("wearable_ingest", {"limit": 60, "window": 60})
-    limited = rate_limit("wearable_ingest", limits["limit"], limits["window"])
+@require_user
+def ingest_wearable_batch(*, user_id: int, is_admin: bool):
+    limited = enforce_rate_limit("wearable_ingest", default={"limit": 60, "window": 60})
     if limited:
         return limited
 
-    payload = validate_wearable_batch_payload(request.get_json() or {})
+    payload = validate_wearable_batch_payload(parse_json_body() or {})
     source_app = payload["source_app"]
     device_id = payload["device_id"]
     tz_name = payload["tz"]
@@ -2928,6 +3312,8 @@ def ingest_wearable_batch():
     status_code = 201 if accepted > 0 else 200
     etl_summary = {"processed": 0, "skipped": 0, "errors": [], "aggregated": 0}
     try:
+        from ingest import process_wearable_raw_by_dedupe_keys  # deferred: ETL stack is ingest-only
+
         etl_summary = process_wearable_raw_by_dedupe_keys(accepted_dedupes)
     except Exception as exc:  # pragma: no cover - defensive
         logger.exception("wearable.ingest.etl_failed", error=str(exc))
@@ -2943,52 +3329,143 @@ def ingest_wearable_batch():
     return jsonify(response_payload), status_code
 
 
+def _run_csv_import(source: IO[bytes], *, user_id: int, filename: str) -> Dict[str, object]:
+    from import_data import import_csv as run_import_csv  # deferred: only CSV imports need it
+
+    summary = run_import_csv(source, user_id=user_id)
+    invalidate_cache(("today", "stats"), user_id=user_id)
+    log_event(
+        "import.csv",
+        "CSV import completed",
+        user_id=user_id,
+        context={"summary": summary, "filename": filename},
+    )
+    return summary
+
+
+def _log_csv_import_failure(exc: Exception, *, user_id: int, filename: str) -> None:
+    log_event(
+        "import.csv_failed",
+        "CSV import failed",
+        user_id=user_id,
+        level="error",
+        context={"error": str(exc), "filename": filename},
+    )
+
+
+def _update_import_job(job_id: str, **fields: Any) -> None:
+    with _import_jobs_lock:
+        job = _import_jobs.get(job_id)
+        if job is not None:
+            job.update(fields, updated_at=time())
+
+
+def _run_import_job(job_id: str, spooled: IO[bytes], user_id: int, filename: str) -> None:
+    try:
+        _update_import_job(job_id, status="running")
+        with app.app_context():
+            try:
+                summary = _run_csv_import(spooled, user_id=user_id, filename=filename)
+            except Exception as exc:
+                _log_csv_import_failure(exc, user_id=user_id, filename=filename)
+                _update_import_job(job_id, status="failed", error=str(exc))
+                return
+        _update_import_job(job_id, status="completed", summary=summary)
+    finally:
+        spooled.close()
+
+
+def _submit_import_job(spooled: IO[bytes], *, user_id: int, filename: str) -> str:
+    """Queue an import on the background worker; the job takes ownership of ``spooled``."""
+    global _import_executor
+    job_id = uuid.uuid4().hex
+    now = time()
+    with _import_jobs_lock:
+        expired = [
+            key
+            for key, job in _import_jobs.items()
+            if job["status"] in ("completed", "failed")
+            and job["updated_at"] <= now - _CSV_IMPORT_JOB_RETENTION_SECONDS
+        ]
+        for key in expired:
+            del _import_jobs[key]
+        _import_jobs[job_id] = {
+            "job_id": job_id,
+            "user_id": user_id,
+            "status": "queued",
+            "summary": None,
+            "error": None,
+            "updated_at": now,
+        }
+        if _import_executor is None:
+            # one worker: imports are write-heavy and serialising them keeps
+            # them from contending with each other for the same rows
+            _import_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="csv-import")
+        executor = _import_executor
+    executor.submit(_run_import_job, job_id, spooled, user_id, filename)
+    return job_id
+
+
 @app.post("/import_csv")
-def import_csv_endpoint():
-    user_id = _current_user_id()
-    if user_id is None:
-        return error_response("unauthorized", "Missing user context", 401)
-    limits = app.config["RATE_LIMITS"]["import_csv"]
-    limited = rate_limit("import_csv", limits["limit"], limits["window"])
+@require_user
+def import_csv_endpoint(*, user_id: int, is_admin: bool):
+    limited = enforce_rate_limit("import_csv")
     if limited:
         return limited
 
-    file = cast(FileStorage, validate_csv_import_payload(request.files))
-    filename_input = file.filename or "import.csv"
+    raw_upload = request.mimetype in _CSV_IMPORT_RAW_MIMETYPES
+    if raw_upload:
+        _, disposition = parse_options_header(request.headers.get("Content-Disposition", ""))
+        filename_input = disposition.get("filename") or "import.csv"
+    else:
+        file = cast(FileStorage, validate_csv_import_payload(request.files))
+        filename_input = file.filename or "import.csv"
+    respond_async = "respond-async" in request.headers.get("Prefer", "").lower()
+
+    # Only used for log context; the upload is never written under this name.
     filename = secure_filename(filename_input)
-    suffix = os.path.splitext(filename)[1] or ".csv"
-    tmp_path = None
+    # Small uploads stay in memory; larger ones roll over to disk on their own.
+    spooled: Optional[IO[bytes]] = tempfile.SpooledTemporaryFile(max_size=_CSV_IMPORT_SPOOL_MAX_BYTES)
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            file.save(tmp.name)
-            tmp_path = tmp.name
-        summary = run_import_csv(tmp_path, user_id=user_id)
+        if raw_upload:
+            # Raw bodies skip the multipart parser and are copied in
+            # fixed-size chunks, so memory stays bounded by the spool size.
+            shutil.copyfileobj(request.stream, spooled, _CSV_IMPORT_COPY_CHUNK_BYTES)
+            if not spooled.tell():
+                raise ValidationError("Missing CSV file", code="missing_file")
+        else:
+            file.save(spooled)
+        spooled.seek(0)
+        if respond_async:
+            job_id = _submit_import_job(spooled, user_id=user_id, filename=filename)
+            spooled = None  # owned and closed by the worker from here on
+            response = jsonify({"job_id": job_id, "status": "queued"})
+            response.headers["Location"] = f"/import_csv/{job_id}"
+            return response, 202
+        summary = _run_csv_import(spooled, user_id=user_id, filename=filename)
+    except ValidationError:
+        raise
     except Exception as exc:  # pragma: no cover - defensive
-        if tmp_path and os.path.exists(tmp_path):
-            os.unlink(tmp_path)
-        log_event(
-            "import.csv_failed",
-            "CSV import failed",
-            user_id=user_id,
-            level="error",
-            context={"error": str(exc), "filename": filename},
-        )
+        _log_csv_import_failure(exc, user_id=user_id, filename=filename)
         return error_response("import_failed", f"Failed to import CSV: {exc}", 500)
     finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+        if spooled is not None:
+            spooled.close()
 
-    invalidate_cache("today")
-    invalidate_cache("stats")
-    log_event(
-        "import.csv",
-        "CSV import completed",
-        user_id=user_id,
-        context={"summary": summary, "filename": filename},
-    )
     return jsonify({"message": "CSV import completed", "summary": summary}), 200
 
 
+@app.get("/import_csv/<job_id>")
+@require_user
+def import_csv_status(job_id: str, *, user_id: int, is_admin: bool):
+    with _import_jobs_lock:
+        job = _import_jobs.get(job_id)
+        if job is not None:
+            job = dict(job)
+    if job is None or (job["user_id"] != user_id and not is_admin):
+        return error_response("not_found", "Import job not found", 404)
+    return jsonify({key: job[key] for key in ("job_id", "status", "summary", "error")})
+
 
 if __name__ == "__main__":
     debug = os.environ.get("FLASK_DEBUG", "0").lower() in ("1", "true", "yes")
@@ -1,18 +1,44 @@
+import atexit
 import logging
+import queue
+import time
 from collections import deque
 from datetime import datetime, timezone
-from threading import Lock
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from itertools import islice
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional, Tuple
 
 import structlog
+from flask import Flask, current_app
 from sqlalchemy.exc import OperationalError, ProgrammingError, SQLAlchemyError
 
 from extensions import db
 from models import ActivityLog
 
 _RUNTIME_LOG_LIMIT = 500
-_runtime_log_buffer = deque(maxlen=_RUNTIME_LOG_LIMIT)
+_RUNTIME_LOG_FIELDS = ("timestamp", "level", "logger", "message")
+# One bounded column per field, appended in lockstep, so a resident entry
+# costs four references rather than a container; dicts are only built for
+# the entries a caller actually reads.
+_ts_buf, _level_buf, _logger_buf, _msg_buf = (
+    deque(maxlen=_RUNTIME_LOG_LIMIT) for _ in _RUNTIME_LOG_FIELDS
+)
 _runtime_log_lock = Lock()
+_ISO_FMT = "%Y-%m-%dT%H:%M:%S"
+_last_log_second = -1
+_last_log_second_str = ""
+
+
+def _format_record_time(created: float) -> str:
+    # Caller holds _runtime_log_lock; records arrive in bursts within the same
+    # second, so the strftime result is reused until the second changes.
+    global _last_log_second, _last_log_second_str
+    second = int(created)
+    if second != _last_log_second:
+        _last_log_second = second
+        _last_log_second_str = time.strftime(_ISO_FMT, time.gmtime(second))
+    return f"{_last_log_second_str}.{int((created - second) * 1000):03d}Z"
 
 
 class _StructlogBufferHandler(logging.Handler):
@@ -21,14 +47,12 @@ class _StructlogBufferHandler(logging.Handler):
             message = record.getMessage()
         except Exception:
             message = str(record.msg)
-        payload = {
-            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
-            "level": record.levelname.lower(),
-            "logger": record.name,
-            "message": message,
-        }
+        level = record.levelname.lower()
         with _runtime_log_lock:
-            _runtime_log_buffer.append(payload)
+            _ts_buf.append(_format_record_time(record.created))
+            _level_buf.append(level)
+            _logger_buf.append(record.name)
+            _msg_buf.append(message)
 
 
 _runtime_log_handler = _StructlogBufferHandler()
@@ -46,6 +70,11 @@ def install_runtime_log_handler() -> None:
 audit_logger = structlog.get_logger("mosaic.audit")
 
 
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+_EXACT_SCALAR_TYPES = frozenset(_SCALAR_TYPES)
+
+
+@lru_cache(maxsize=32)
 def _normalize_level(level: str) -> str:
     return (level or "info").strip().lower() or "info"
 
@@ -55,7 +84,14 @@ def _safe_context(context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         return {}
     safe: Dict[str, Any] = {}
     for key, value in context.items():
-        if isinstance(value, (str, int, float, bool)) or value is None:
+        # Exact-type set lookup covers nearly every value; the isinstance
+        # chain only runs for subclasses (enums, custom dicts) and the rest.
+        value_type = type(value)
+        if value_type in _EXACT_SCALAR_TYPES:
+            safe[key] = value
+        elif value_type is dict:
+            safe[key] = _safe_context(value)
+        elif isinstance(value, _SCALAR_TYPES):
             safe[key] = value
         elif isinstance(value, dict):
             safe[key] = _safe_context(value)
@@ -64,44 +100,145 @@ def _safe_context(context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
     return safe
 
 
-def _persist_log(
-    *,
-    timestamp: datetime,
-    user_id: Optional[int],
-    event_type: str,
-    message: str,
-    level: str,
-    context: Dict[str, Any],
-) -> None:
+_LOG_QUEUE_MAX_SIZE = 10_000
+_LOG_BATCH_SIZE = 200
+_LOG_FLUSH_INTERVAL_SECONDS = 0.2
+
+# (app, ActivityLog column values); drained by a single writer thread so the
+# request that emitted the event never waits on the INSERT.
+_log_queue: "queue.Queue[Tuple[Flask, Dict[str, Any]]]" = queue.Queue(maxsize=_LOG_QUEUE_MAX_SIZE)
+_log_writer_thread: Optional[Thread] = None
+_log_writer_start_lock = Lock()
+_log_writer_stop = Event()
+_dropped_log_events = 0
+_TABLE_MISSING_RECHECK_SECONDS = 60
+# time.monotonic() deadline until which inserts are skipped; 0.0 when the
+# table is believed to exist.
+_table_missing_until = 0.0
+
+
+def _persist_logs(payloads: List[Dict[str, Any]]) -> None:
+    global _table_missing_until
+    if _table_missing_until and time.monotonic() < _table_missing_until:
+        return
     session = db.session
     try:
-        payload: Dict[str, Any] = {
-            "timestamp": timestamp,
-            "user_id": user_id,
-            "event_type": event_type,
-            "message": message,
-            "context": context,
-            "level": level,
-        }
-        session.add(ActivityLog(**payload))
+        session.add_all([ActivityLog(**payload) for payload in payloads])
         session.commit()
+        _table_missing_until = 0.0
+        return
     except SQLAlchemyError as exc:
         session.rollback()
         if is_activity_log_table_missing_error(exc):
+            # Skip further INSERTs for a while instead of failing each batch;
+            # re-checked periodically so a migration needs no restart.
+            _table_missing_until = time.monotonic() + _TABLE_MISSING_RECHECK_SECONDS
             audit_logger.warning(
                 "activity_log.table_missing",
-                event_type=event_type,
-                user_id=user_id,
-                message=message,
+                event_type=payloads[0]["event_type"],
+                user_id=payloads[0]["user_id"],
+                message=payloads[0]["message"],
+                dropped=len(payloads),
                 details="Activity log table missing. Apply latest migrations.",
             )
-        else:
+            return
+        if len(payloads) == 1:
             audit_logger.error(
                 "activity_log.persist_failed",
-                event_type=event_type,
-                user_id=user_id,
+                event_type=payloads[0]["event_type"],
+                user_id=payloads[0]["user_id"],
                 error=str(exc),
             )
+            return
+    # One bad row (e.g. a user deleted meanwhile) must not drop the whole
+    # batch; retry row by row so only the offending event is lost.
+    for payload in payloads:
+        _persist_logs([payload])
+
+
+def reset_table_missing_flag() -> None:
+    """Retry activity log inserts immediately, e.g. right after migrating."""
+    global _table_missing_until
+    _table_missing_until = 0.0
+
+
+def _write_batch(batch: List[Tuple[Flask, Dict[str, Any]]]) -> None:
+    by_app: Dict[Flask, List[Dict[str, Any]]] = {}
+    for app, payload in batch:
+        by_app.setdefault(app, []).append(payload)
+    for app, payloads in by_app.items():
+        with app.app_context():
+            try:
+                _persist_logs(payloads)
+            finally:
+                db.session.remove()
+
+
+def _drain_log_queue(block: bool) -> bool:
+    """Write one batch; returns False when nothing was waiting."""
+    try:
+        first = _log_queue.get(timeout=_LOG_FLUSH_INTERVAL_SECONDS) if block else _log_queue.get_nowait()
+    except queue.Empty:
+        return False
+    batch = [first]
+    while len(batch) < _LOG_BATCH_SIZE:
+        try:
+            batch.append(_log_queue.get_nowait())
+        except queue.Empty:
+            break
+    try:
+        _write_batch(batch)
+    except Exception:  # pragma: no cover - keep the writer alive
+        audit_logger.exception("activity_log.writer_failed", batch_size=len(batch))
+    finally:
+        for _ in batch:
+            _log_queue.task_done()
+    return True
+
+
+def _log_writer_loop() -> None:
+    while not _log_writer_stop.is_set():
+        _drain_log_queue(block=True)
+    while _drain_log_queue(block=False):
+        pass
+
+
+def _ensure_log_writer_started() -> None:
+    global _log_writer_thread
+    if _log_writer_thread and _log_writer_thread.is_alive():
+        return
+    with _log_writer_start_lock:
+        if _log_writer_thread and _log_writer_thread.is_alive():
+            return
+        _log_writer_stop.clear()
+        thread = Thread(target=_log_writer_loop, daemon=True, name="activity-log-writer")
+        thread.start()
+        _log_writer_thread = thread
+
+
+def flush_activity_logs() -> None:
+    """Block until every queued audit event has been written."""
+    if _log_writer_thread and _log_writer_thread.is_alive():
+        _log_queue.join()
+        return
+    while _drain_log_queue(block=False):
+        pass
+
+
+def stop_log_writer(timeout: Optional[float] = None) -> None:
+    _log_writer_stop.set()
+    thread = _log_writer_thread
+    if thread and thread.is_alive():
+        thread.join(timeout)
+    while _drain_log_queue(block=False):
+        pass
+
+
+def get_dropped_log_events() -> int:
+    return _dropped_log_events
+
+
+atexit.register(stop_log_writer, 5.0)
 
 
 def log_event(
@@ -112,7 +249,8 @@ def log_event(
     level: str = "info",
     context: Optional[Dict[str, Any]] = None,
 ) -> None:
-    """Persist the event and mirror it to structlog."""
+    """Mirror the event to structlog and queue it for persistence."""
+    global _dropped_log_events
     normalized_level = _normalize_level(level)
     normalized_context = _safe_context(context)
     timestamp = datetime.now(timezone.utc)
@@ -126,44 +264,55 @@ def log_event(
         context=normalized_context,
     )
 
-    _persist_log(
-        timestamp=timestamp,
-        user_id=user_id,
-        event_type=event_type,
-        message=message,
-        level=normalized_level,
-        context=normalized_context,
-    )
+    payload: Dict[str, Any] = {
+        "timestamp": timestamp,
+        "user_id": user_id,
+        "event_type": event_type,
+        "message": message,
+        "context": normalized_context,
+        "level": normalized_level,
+    }
+    _ensure_log_writer_started()
+    try:
+        _log_queue.put_nowait((current_app._get_current_object(), payload))
+    except queue.Full:
+        _dropped_log_events += 1
+        audit_logger.warning("activity_log.queue_full", event_type=event_type, user_id=user_id)
 
 
 def get_runtime_logs(limit: Optional[int] = None) -> list[Dict[str, Any]]:
-    with _runtime_log_lock:
-        items = list(_runtime_log_buffer)
     if limit is not None:
         try:
             limit = int(limit)
         except (TypeError, ValueError):
             limit = None
-    if limit is None or limit >= len(items):
-        return items
-    return items[-limit:]
+    with _runtime_log_lock:
+        size = len(_ts_buf)
+        start = size - limit if limit is not None and 0 < limit < size else 0
+        columns = [list(islice(buf, start, None)) for buf in (_ts_buf, _level_buf, _logger_buf, _msg_buf)]
+    return [dict(zip(_RUNTIME_LOG_FIELDS, entry)) for entry in zip(*columns)]
+
+
+_TABLE_MISSING_INDICATORS = (
+    "does not exist",
+    "no such table",
+    "undefined table",
+    "relation 'activity_logs' does not exist",
+    "relation \"activity_logs\" does not exist",
+)
 
 
 def _extract_error_message(exc: SQLAlchemyError) -> str:
     if isinstance(exc, (ProgrammingError, OperationalError)) and getattr(exc, "orig", None):
-        return str(exc.orig).lower()
-    return str(exc).lower()
+        return str(exc.orig)
+    return str(exc)
 
 
 def is_activity_log_table_missing_error(exc: SQLAlchemyError) -> bool:
-    message = _extract_error_message(exc)
-    if "activity_logs" not in message:
+    raw = _extract_error_message(exc)
+    # Unrelated errors are rejected on the raw text; only candidates pay for
+    # lowercasing a message that may carry the full statement and parameters.
+    if "activity_logs" not in raw and "ACTIVITY_LOGS" not in raw:
         return False
-    indicators = (
-        "does not exist",
-        "no such table",
-        "undefined table",
-        "relation 'activity_logs' does not exist",
-        "relation \"activity_logs\" does not exist",
-    )
-    return any(indicator in message for indicator in indicators)
+    message = raw.lower()
+    return any(indicator in message for indicator in _TABLE_MISSING_INDICATORS)
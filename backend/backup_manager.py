@@ -1,17 +1,57 @@
 import csv
-import json
+import io
+import os
 import threading
 import zipfile
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
 
+import orjson
 import structlog
 
 from db_utils import connection as sa_connection, transactional_connection
 from extensions import db
 
 
+_ENTRY_CSV_FIELDS = (
+    "id",
+    "date",
+    "activity",
+    "value",
+    "note",
+    "activity_category",
+    "activity_goal",
+    "activity_type",
+)
+_ACTIVITY_CSV_FIELDS = (
+    "id",
+    "name",
+    "category",
+    "activity_type",
+    "goal",
+    "description",
+    "active",
+    "frequency_per_day",
+    "frequency_per_week",
+)
+
+
+def _dataset_rows(
+    dataset: str, rows: List[Dict[str, object]], fields: Tuple[str, ...]
+) -> Iterator[Tuple[object, ...]]:
+    # map(row.get, ...) keeps the per-field lookups in C; a missing column
+    # still yields an empty cell rather than a KeyError.
+    prefix = (dataset,)
+    for row in rows:
+        yield prefix + tuple(map(row.get, fields))
+
+
+# Upper bound on how long the scheduler sleeps without re-reading settings.
+_SETTINGS_RECHECK_SECONDS = 300
+_FAILED_BACKUP_RETRY_SECONDS = 60
+
+
 class BackupManager:
     """Lightweight backup scheduler that creates JSON/CSV dumps of the Mosaic database."""
 
@@ -26,6 +66,10 @@ class BackupManager:
         self.backup_dir.mkdir(parents=True, exist_ok=True)
         self._lock = threading.Lock()
         self._stop_event = threading.Event()
+        # Set by toggle() so the scheduler re-reads settings immediately
+        # instead of polling the database on a short interval.
+        self._settings_changed = threading.Event()
+        self._backups_cache: Optional[Tuple[int, List[Dict[str, object]]]] = None
         self._thread: Optional[threading.Thread] = None
         self._ensure_settings_row()
         self._ensure_scheduler()
@@ -34,56 +78,93 @@ class BackupManager:
     def create_backup(self, *, initiated_by: str = "manual") -> Dict[str, object]:
         with self._lock:
             now = datetime.now(timezone.utc)
-            timestamp = now.strftime("%Y%m%d-%H%M%S")
+            timestamp = (
+                f"{now.year:04d}{now.month:02d}{now.day:02d}"
+                f"-{now.hour:02d}{now.minute:02d}{now.second:02d}"
+            )
             payload = self._fetch_database_payload()
 
-            json_path = self.backup_dir / f"backup-{timestamp}.json"
-            csv_path = self.backup_dir / f"backup-{timestamp}.csv"
+            json_name = f"backup-{timestamp}.json"
+            csv_name = f"backup-{timestamp}.csv"
             zip_path = self.backup_dir / f"backup-{timestamp}.zip"
 
-            with json_path.open("w", encoding="utf-8") as fh:
-                json.dump(
-                    {
-                        "generated_at": now.isoformat(),
-                        "initiated_by": initiated_by,
-                        "entries": payload["entries"],
-                        "activities": payload["activities"],
-                    },
-                    fh,
-                    ensure_ascii=False,
-                    indent=2,
-                )
-
-            self._write_csv_dump(csv_path, payload["entries"], payload["activities"])
+            # orjson walks the row dicts in C; a generated per-field dumper
+            # would re-enter Python for every field and be slower.
+            json_bytes = orjson.dumps(
+                {
+                    "generated_at": now.isoformat(),
+                    "initiated_by": initiated_by,
+                    "entries": payload["entries"],
+                    "activities": payload["activities"],
+                },
+                default=str,
+                option=orjson.OPT_INDENT_2,
+            )
+            csv_buffer = io.StringIO(newline="")
+            self._write_csv_dump(csv_buffer, payload["entries"], payload["activities"])
 
-            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as archive:
-                archive.write(json_path, arcname=json_path.name)
-                archive.write(csv_path, arcname=csv_path.name)
+            # Both dumps go straight into the archive; only the zip touches disk.
+            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+                archive.writestr(json_name, json_bytes)
+                archive.writestr(csv_name, csv_buffer.getvalue())
 
+            self._backups_cache = None
             self._update_last_run(now)
 
             return {
                 "timestamp": timestamp,
-                "json": json_path.name,
-                "csv": csv_path.name,
+                "json": json_name,
+                "csv": csv_name,
                 "zip": zip_path.name,
                 "generated_at": now.isoformat(),
             }
 
     def list_backups(self) -> List[Dict[str, object]]:
+        # Adding or removing a file bumps the directory mtime, so the listing is
+        # rebuilt only when the set of backups actually changed.
+        try:
+            dir_mtime = os.stat(self.backup_dir).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        cached = self._backups_cache
+        if cached is not None and cached[0] == dir_mtime:
+            return [dict(item) for item in cached[1]]
+
         backups: List[Dict[str, object]] = []
-        for path in sorted(self.backup_dir.glob("backup-*.zip"), reverse=True):
-            stats = path.stat()
-            backups.append(
-                {
-                    "filename": path.name,
-                    "size_bytes": stats.st_size,
-                    "created_at": datetime.fromtimestamp(stats.st_mtime, timezone.utc).isoformat(),
-                }
+        with os.scandir(self.backup_dir) as entries:
+            archives = sorted(
+                (entry for entry in entries if entry.name.startswith("backup-") and entry.name.endswith(".zip")),
+                key=lambda entry: entry.name,
+                reverse=True,
             )
-        return backups
+            for entry in archives:
+                stats = entry.stat()
+                backups.append(
+                    {
+                        "filename": entry.name,
+                        "size_bytes": stats.st_size,
+                        "created_at": datetime.fromtimestamp(stats.st_mtime, timezone.utc).isoformat(),
+                    }
+                )
+        self._backups_cache = (dir_mtime, backups)
+        return [dict(item) for item in backups]
 
     def get_status(self) -> Dict[str, object]:
+        enabled, interval, last_run_value = self._read_settings()
+
+        if isinstance(last_run_value, datetime):
+            last_run = last_run_value.isoformat()
+        else:
+            last_run = last_run_value
+
+        return {
+            "enabled": enabled,
+            "interval_minutes": interval,
+            "last_run": last_run,
+            "backups": self.list_backups(),
+        }
+
+    def _read_settings(self) -> Tuple[bool, int, Any]:
         row: Optional[Dict[str, object]] = None
 
         with self.app.app_context():
@@ -107,18 +188,7 @@ class BackupManager:
             interval = int(interval_raw)
         else:
             interval = 60
-
-        if isinstance(last_run_value, datetime):
-            last_run = last_run_value.isoformat()
-        else:
-            last_run = last_run_value
-
-        return {
-            "enabled": enabled,
-            "interval_minutes": interval,
-            "last_run": last_run,
-            "backups": self.list_backups(),
-        }
+        return enabled, interval, last_run_value
 
     def toggle(self, enabled: Optional[bool] = None, interval_minutes: Optional[int] = None) -> Dict[str, object]:
         if interval_minutes is not None:
@@ -138,30 +208,38 @@ class BackupManager:
                             interval_minutes or 60,
                         ),
                     )
-                    return self.get_status()
+                else:
+                    self._update_settings_row(conn, dict(row_mapping), enabled, interval_minutes)
 
-                row = dict(row_mapping)
-                existing_enabled_raw: Any = row.get("enabled", False)
-                existing_interval_raw: Any = row.get("interval_minutes", 60)
+        self._settings_changed.set()
+        return self.get_status()
 
-                new_enabled = bool(existing_enabled_raw) if enabled is None else bool(enabled)
+    @staticmethod
+    def _update_settings_row(
+        conn: Any,
+        row: Dict[str, Any],
+        enabled: Optional[bool],
+        interval_minutes: Optional[int],
+    ) -> None:
+        existing_enabled_raw: Any = row.get("enabled", False)
+        existing_interval_raw: Any = row.get("interval_minutes", 60)
 
-                candidate_interval = interval_minutes
-                if candidate_interval is None:
-                    if isinstance(existing_interval_raw, (int, float, str)):
-                        candidate_interval = int(existing_interval_raw)
-                    else:
-                        candidate_interval = 60
-                else:
-                    candidate_interval = int(candidate_interval)
-                new_interval = candidate_interval
+        new_enabled = bool(existing_enabled_raw) if enabled is None else bool(enabled)
 
-                conn.execute(
-                    "UPDATE backup_settings SET enabled = ?, interval_minutes = ? WHERE id = ?",
-                    (new_enabled, new_interval, row["id"]),
-                )
+        candidate_interval = interval_minutes
+        if candidate_interval is None:
+            if isinstance(existing_interval_raw, (int, float, str)):
+                candidate_interval = int(existing_interval_raw)
+            else:
+                candidate_interval = 60
+        else:
+            candidate_interval = int(candidate_interval)
+        new_interval = candidate_interval
 
-        return self.get_status()
+        conn.execute(
+            "UPDATE backup_settings SET enabled = ?, interval_minutes = ? WHERE id = ?",
+            (new_enabled, new_interval, row["id"]),
+        )
 
     def get_backup_path(self, filename: str) -> Path:
         if "/" in filename or "\\" in filename or not filename.startswith("backup-"):
@@ -175,6 +253,10 @@ class BackupManager:
     def _ensure_settings_row(self) -> None:
         with self.app.app_context():
             with transactional_connection(db.engine) as conn:
+                # One round trip: the DDL and the conditional seed run as a
+                # single multi-statement execute. NOT EXISTS rather than
+                # ON CONFLICT (id) so an existing row with another id is kept
+                # and the SERIAL sequence is left alone.
                 conn.execute(
                     """
                     CREATE TABLE IF NOT EXISTS backup_settings (
@@ -182,15 +264,12 @@ class BackupManager:
                         enabled BOOLEAN NOT NULL DEFAULT FALSE,
                         interval_minutes INTEGER NOT NULL DEFAULT 60,
                         last_run TIMESTAMPTZ
-                    )
+                    );
+                    INSERT INTO backup_settings (enabled, interval_minutes)
+                    SELECT FALSE, 60
+                    WHERE NOT EXISTS (SELECT 1 FROM backup_settings)
                     """
                 )
-                has_row = conn.execute("SELECT 1 FROM backup_settings LIMIT 1").scalar()
-                if not has_row:
-                    conn.execute(
-                        "INSERT INTO backup_settings (enabled, interval_minutes) VALUES (?, ?)",
-                        (False, 60),
-                    )
 
     def _ensure_scheduler(self) -> None:
         if self._thread and self._thread.is_alive():
@@ -200,19 +279,17 @@ class BackupManager:
 
     def _scheduler_loop(self) -> None:
         while not self._stop_event.is_set():
-            status = self.get_status()
-            if not status["enabled"]:
-                self._stop_event.wait(30)
+            self._settings_changed.clear()
+            enabled, interval_value, last_run_value = self._read_settings()
+            if not enabled:
+                self._wait_for_settings(_SETTINGS_RECHECK_SECONDS)
                 continue
 
-            raw_interval = status.get("interval_minutes", 60)
-            try:
-                interval_value = int(raw_interval)  # type: ignore[arg-type]
-            except (TypeError, ValueError):
-                interval_value = 60
             interval = max(interval_value, 5)
-            raw_last_run = status.get("last_run")
-            last_run = self._parse_iso(raw_last_run if isinstance(raw_last_run, str) else None)
+            if isinstance(last_run_value, datetime):
+                last_run: Optional[datetime] = last_run_value
+            else:
+                last_run = self._parse_iso(last_run_value if isinstance(last_run_value, str) else None)
             now = datetime.now(timezone.utc)
 
             if last_run is None or (now - last_run).total_seconds() >= interval * 60:
@@ -220,10 +297,16 @@ class BackupManager:
                     self.create_backup(initiated_by="scheduler")
                 except Exception as exc:  # pragma: no cover - logged by Flask later
                     self.logger.exception("backup.scheduler_failed", error=str(exc))
-                self._stop_event.wait(5)
+                    self._wait_for_settings(_FAILED_BACKUP_RETRY_SECONDS)
             else:
                 remaining = (interval * 60) - (now - last_run).total_seconds()
-                self._stop_event.wait(max(5, min(remaining, 60)))
+                self._wait_for_settings(min(remaining, _SETTINGS_RECHECK_SECONDS))
+
+    def _wait_for_settings(self, timeout: float) -> None:
+        # Settings changed through another process are still picked up by the
+        # bounded timeout.
+        if not self._stop_event.is_set():
+            self._settings_changed.wait(max(timeout, 1))
 
     def _fetch_database_payload(self) -> Dict[str, List[Dict[str, object]]]:
         with self.app.app_context():
@@ -239,67 +322,39 @@ class BackupManager:
 
     def _write_csv_dump(
         self,
-        csv_path: Path,
+        fh: TextIO,
         entries: List[Dict[str, object]],
         activities: List[Dict[str, object]],
     ) -> None:
-        with csv_path.open("w", newline="", encoding="utf-8") as fh:
-            writer = csv.writer(fh)
-            writer.writerow([
+        writer = csv.writer(fh)
+        writer.writerow([
+            "dataset",
+            "id",
+            "date",
+            "activity",
+            "value",
+            "note",
+            "category",
+            "goal",
+            "activity_type",
+        ])
+        writer.writerows(_dataset_rows("entries", entries, _ENTRY_CSV_FIELDS))
+        writer.writerow([])
+        writer.writerow(
+            [
                 "dataset",
                 "id",
-                "date",
-                "activity",
-                "value",
-                "note",
+                "name",
                 "category",
-                "goal",
                 "activity_type",
-            ])
-            for row in entries:
-                writer.writerow(
-                    [
-                        "entries",
-                        row.get("id"),
-                        row.get("date"),
-                        row.get("activity"),
-                        row.get("value"),
-                        row.get("note"),
-                        row.get("activity_category"),
-                        row.get("activity_goal"),
-                        row.get("activity_type"),
-                    ]
-                )
-            writer.writerow([])
-            writer.writerow(
-                [
-                    "dataset",
-                    "id",
-                    "name",
-                    "category",
-                    "activity_type",
-                    "goal",
-                    "description",
-                    "active",
-                    "frequency_per_day",
-                    "frequency_per_week",
-                ]
-            )
-            for row in activities:
-                writer.writerow(
-                    [
-                        "activities",
-                        row.get("id"),
-                        row.get("name"),
-                        row.get("category"),
-                        row.get("activity_type"),
-                        row.get("goal"),
-                        row.get("description"),
-                        row.get("active"),
-                        row.get("frequency_per_day"),
-                        row.get("frequency_per_week"),
-                    ]
-                )
+                "goal",
+                "description",
+                "active",
+                "frequency_per_day",
+                "frequency_per_week",
+            ]
+        )
+        writer.writerows(_dataset_rows("activities", activities, _ACTIVITY_CSV_FIELDS))
 
     def _update_last_run(self, timestamp: datetime) -> None:
         with self.app.app_context():
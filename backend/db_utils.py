@@ -1,48 +1,61 @@
 from __future__ import annotations
 
 from contextlib import contextmanager
-from typing import Iterator, Mapping, Optional, Sequence, Tuple, cast
+from functools import lru_cache
+from typing import Iterator, Mapping, Optional, Sequence, Tuple
 
 from sqlalchemy import text
 from sqlalchemy.engine import Connection, Engine, Result, RowMapping
+from sqlalchemy.sql.elements import TextClause
 
 
-def _prepare_statement(sql: str, params: Sequence[object] | Mapping[str, object] | None) -> Tuple[str, dict]:
+@lru_cache(maxsize=1024)
+def _compile_sql(sql: str) -> Tuple[TextClause, Tuple[str, ...]]:
+    """Rewrite ``?`` placeholders to ``:p0, :p1, ...`` once per SQL string.
+
+    Returns the ready ``text()`` clause and its parameter names in order; the
+    handful of distinct statements the app issues are rewritten only once.
+    """
+    parts = sql.split("?")
+    keys = tuple(f"p{index}" for index in range(len(parts) - 1))
+    rebuilt = parts[0] + "".join(f":{key}{part}" for key, part in zip(keys, parts[1:]))
+    return text(rebuilt), keys
+
+
+@lru_cache(maxsize=256)
+def _text_clause(sql: str) -> TextClause:
+    # Named-parameter and parameterless SQL is passed through untouched.
+    return text(sql)
+
+
+def _prepare_statement(
+    sql: str, params: Sequence[object] | Mapping[str, object] | None
+) -> Tuple[TextClause, dict]:
     if params is None:
-        return sql, {}
+        return _text_clause(sql), {}
     if isinstance(params, Mapping):
-        return sql, dict(params)
+        return _text_clause(sql), dict(params)
     if not isinstance(params, Sequence):
         raise TypeError("Unsupported parameter type; expected sequence or mapping.")
 
-    placeholders = sql.count("?")
-    if placeholders != len(params):
-        raise ValueError(f"Parameter count mismatch: expected {placeholders}, got {len(params)}.")
-
-    bound_params: dict[str, object] = {}
-    parts = sql.split("?")
-    rebuilt = parts[0]
-    for index, (part, value) in enumerate(zip(parts[1:], params)):
-        key = f"p{index}"
-        rebuilt += f":{key}{part}"
-        bound_params[key] = value
-    return rebuilt, bound_params
+    clause, keys = _compile_sql(sql)
+    if len(keys) != len(params):
+        raise ValueError(f"Parameter count mismatch: expected {len(keys)}, got {len(params)}.")
+    return clause, dict(zip(keys, params))
 
 
 class ResultWrapper:
     def __init__(self, result: Result):
         self._result = result
 
-    def fetchone(self) -> Optional[Mapping[str, object]]:
-        row = self._result.fetchone()
-        return None if row is None else cast(Mapping[str, object], row._mapping)
+    def fetchone(self) -> Optional[RowMapping]:
+        return self._result.mappings().fetchone()
 
-    def fetchall(self) -> list[Mapping[str, object]]:
-        return [cast(Mapping[str, object], row._mapping) for row in self._result.fetchall()]
+    def fetchall(self) -> list[RowMapping]:
+        return self._result.mappings().all()
 
-    def first(self) -> Optional[Mapping[str, object]]:
-        row = self._result.first()
-        return None if row is None else cast(Mapping[str, object], row._mapping)
+    def first(self) -> Optional[RowMapping]:
+        return self._result.mappings().first()
 
     def mappings(self):
         return self._result.mappings()
@@ -75,7 +88,7 @@ class SQLAlchemyConnectionWrapper:
         params: Sequence[object] | Mapping[str, object] | None = None,
     ) -> ResultWrapper:
         statement, bound_params = _prepare_statement(sql, params)
-        result = self._connection.execute(text(statement), bound_params)
+        result = self._connection.execute(statement, bound_params)
         return ResultWrapper(result)
 
     def close(self) -> None:
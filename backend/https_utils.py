@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Tuple
 
@@ -37,7 +38,10 @@ def _find_cert_directory() -> Path:
     )
 
 
+@lru_cache(maxsize=1)
 def resolve_ssl_context() -> Optional[Tuple[str, str]]:
+    # Memoised: the environment and certificate files do not change while the
+    # process runs. Failures raise and are therefore not cached.
     use_https = os.environ.get("USE_HTTPS", "").strip().lower() in ("1", "true", "yes", "on")
     if not use_https:
         return None
@@ -1,136 +1,320 @@
 import csv
-from typing import Dict, Optional, Set, Tuple
+import io
+import os
+from contextlib import contextmanager
+from typing import IO, Dict, Iterator, List, Optional, Set, Tuple, Union
 
 from flask import has_app_context
 
-from pydantic import ValidationError
-from sqlalchemy import select
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert, select, update
 
 from extensions import db
 from models import Activity, Entry, User
 from schemas import CSVImportRow
 
 
-def _ensure_activity(parsed: CSVImportRow, *, user_id: Optional[int]) -> Activity:
+def _new_activity(parsed: CSVImportRow, *, user_id: Optional[int]) -> Activity:
+    payload: Dict[str, object] = {
+        "name": parsed.activity,
+        "category": parsed.category or "",
+        "goal": parsed.goal,
+        "description": parsed.description or "",
+        "active": True,
+        "frequency_per_day": parsed.frequency_per_day or 1,
+        "frequency_per_week": parsed.frequency_per_week or 1,
+        "deactivated_at": None,
+        "user_id": user_id,
+        "activity_type": "positive",
+    }
+    return Activity(**payload)
+
+
+def _prefetch_activities(
+    batch: List[Tuple[int, CSVImportRow]],
+    *,
+    user_id: Optional[int],
+    known: Dict[str, Activity],
+) -> Set[int]:
+    """Make sure ``known`` holds every activity a batch names.
+
+    Names not seen earlier in the import are looked up with one ``IN`` query;
+    the ones still missing are created from the first row naming them and
+    inserted in a single flush. Returns the batch positions of those rows.
+    """
+    names = {parsed.activity for _, parsed in batch} - known.keys()
+    if not names:
+        return set()
     session = db.session
-    stmt = select(Activity).where(Activity.name == parsed.activity)
-    activity = session.execute(stmt).scalar_one_or_none()
-
-    if activity is None:
-        payload: Dict[str, object] = {
-            "name": parsed.activity,
-            "category": parsed.category or "",
-            "goal": parsed.goal,
-            "description": parsed.description or "",
-            "active": True,
-            "frequency_per_day": parsed.frequency_per_day or 1,
-            "frequency_per_week": parsed.frequency_per_week or 1,
-            "deactivated_at": None,
-            "user_id": user_id,
-            "activity_type": "positive",
-        }
-        activity = Activity(**payload)
-        session.add(activity)
+    for activity in session.scalars(select(Activity).where(Activity.name.in_(sorted(names)))):
+        known[activity.name] = activity
+
+    creators: Set[int] = set()
+    created: List[Activity] = []
+    for position, (_, parsed) in enumerate(batch):
+        if parsed.activity not in known:
+            activity = _new_activity(parsed, user_id=user_id)
+            known[parsed.activity] = activity
+            created.append(activity)
+            creators.add(position)
+    if created:
+        session.add_all(created)
         session.flush()
-        return activity
+    return creators
 
+
+def _apply_activity_row(parsed: CSVImportRow, activity: Activity, *, user_id: Optional[int]) -> None:
+    """Claim an existing activity for ``user_id`` and apply the row's changes to it."""
     if user_id is not None and activity.user_id not in (None, user_id):
         raise ValueError(f"Activity '{parsed.activity}' already belongs to another user")
 
     if user_id is not None and activity.user_id is None:
         activity.user_id = user_id
 
-    updated = False
-
+    # changes are flushed with the batch's entry writes
     if parsed.category and parsed.category != (activity.category or ""):
         activity.category = parsed.category
-        updated = True
     if parsed.description and parsed.description != (activity.description or ""):
         activity.description = parsed.description
-        updated = True
     if parsed.goal is not None and float(activity.goal or 0) != float(parsed.goal):
         activity.goal = parsed.goal
-        updated = True
     if parsed.frequency_per_day is not None and activity.frequency_per_day != parsed.frequency_per_day:
         activity.frequency_per_day = parsed.frequency_per_day
-        updated = True
     if parsed.frequency_per_week is not None and activity.frequency_per_week != parsed.frequency_per_week:
         activity.frequency_per_week = parsed.frequency_per_week
-        updated = True
     if not activity.active:
         activity.active = True
         activity.deactivated_at = None
-        updated = True
 
-    if updated:
-        db.session.flush()
 
-    return activity
+EntryKey = Tuple[str, str]
+# (id, user_id) of an entry that already exists
+ExistingEntry = Tuple[int, Optional[int]]
 
 
-def _upsert_entry(parsed: CSVImportRow, activity: Activity, *, user_id: Optional[int]) -> str:
-    session = db.session
-    stmt = select(Entry).where(Entry.date == parsed.date, Entry.activity == parsed.activity)
+def _prefetch_entries(rows: List[CSVImportRow], *, user_id: Optional[int]) -> Dict[EntryKey, ExistingEntry]:
+    """Load the existing entries a batch of rows may update, in one query."""
+    if not rows:
+        return {}
+    stmt = select(Entry.id, Entry.date, Entry.activity, Entry.user_id).where(
+        Entry.date.in_(sorted({parsed.date for parsed in rows})),
+        Entry.activity.in_(sorted({parsed.activity for parsed in rows})),
+    )
     if user_id is not None:
         stmt = stmt.where(Entry.user_id == user_id)
-    entry = session.execute(stmt).scalar_one_or_none()
-
+    return {
+        (entry_date, activity_name): (entry_id, owner_id)
+        for entry_id, entry_date, activity_name, owner_id in db.session.execute(stmt)
+    }
+
+
+def _upsert_entry(
+    parsed: CSVImportRow,
+    activity: Activity,
+    *,
+    user_id: Optional[int],
+    existing: Dict[EntryKey, ExistingEntry],
+    inserts: List[Dict[str, object]],
+    updates: List[Dict[str, object]],
+) -> str:
+    """Queue the insert or update for one row; the caller executes them in bulk."""
     activity_category = parsed.category or activity.category or ""
     activity_goal = parsed.goal if parsed.goal is not None else activity.goal or 0.0
     description = parsed.description or activity.description or ""
     entry_activity_type = getattr(activity, "activity_type", None) or "positive"
-
-    if entry is None:
-        payload: Dict[str, object] = {
-            "date": parsed.date,
-            "activity": parsed.activity,
-            "description": description,
-            "value": float(parsed.value),
-            "note": parsed.note,
-            "activity_category": activity_category,
-            "activity_goal": activity_goal,
-            "activity_type": entry_activity_type,
-            "user_id": user_id,
-        }
-        entry = Entry(**payload)
-        session.add(entry)
+    payload: Dict[str, object] = {
+        "value": float(parsed.value),
+        "note": parsed.note,
+        "description": description,
+        "activity_category": activity_category,
+        "activity_goal": activity_goal,
+        "activity_type": entry_activity_type,
+    }
+
+    match = existing.get((parsed.date, parsed.activity))
+    if match is None:
+        payload.update(date=parsed.date, activity=parsed.activity, user_id=user_id)
+        inserts.append(payload)
         return "created"
 
-    if user_id is not None and entry.user_id is None:
-        entry.user_id = user_id
-
-    entry.value = float(parsed.value)
-    entry.note = parsed.note
-    entry.description = description
-    entry.activity_category = activity_category
-    entry.activity_goal = activity_goal
-    entry.activity_type = entry_activity_type
+    entry_id, owner_id = match
+    payload.update(id=entry_id, user_id=owner_id if owner_id is not None else user_id)
+    updates.append(payload)
     return "updated"
 
 
-def _import_csv_impl(csv_path: str, *, commit: bool = True, user_id: Optional[int] = None) -> Dict[str, object]:
+CSVSource = Union[str, "os.PathLike[str]", IO[bytes]]
+
+
+@contextmanager
+def _open_csv_source(source: CSVSource) -> Iterator[IO[str]]:
+    """Yield a text stream over a CSV path or an already open binary stream."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline="", encoding="utf-8") as csvfile:
+            yield csvfile
+        return
+
+    wrapper = io.TextIOWrapper(source, encoding="utf-8", newline="")
+    try:
+        yield wrapper
+    finally:
+        # Leave the caller's stream open; it owns the underlying file.
+        wrapper.detach()
+
+
+_VALIDATION_BATCH_ROWS = 500
+_ROWS_ADAPTER = TypeAdapter(List[CSVImportRow])
+
+CSVRow = Dict[Optional[str], Union[Optional[str], List[str]]]
+ValidatedRow = Tuple[int, CSVRow, Optional[CSVImportRow], str]
+
+
+def _iter_csv_rows(csvfile: IO[str]) -> Iterator[Tuple[int, CSVRow]]:
+    """Yield ``(line, row)`` for each non-blank record, keyed like ``csv.DictReader``.
+
+    Built on ``csv.reader`` so blank records are dropped before a dict is
+    made, and well-formed records are zipped straight onto the header.
+    Short and long records are padded and collected the way ``DictReader``
+    does it (``None`` values, extras under the ``None`` key).
+    """
+    reader = csv.reader(csvfile)
+    header = next(reader, None)
+    if header is None:
+        raise ValueError("CSV file is missing a header row")
+
+    fieldnames = tuple(header)
+    width = len(fieldnames)
+    index = 1
+    for values in reader:
+        if not values:
+            continue
+        index += 1
+        if not any(value.strip() for value in values):
+            continue
+        row: CSVRow = dict(zip(fieldnames, values))
+        if len(values) < width:
+            for name in fieldnames[len(values):]:
+                row[name] = None
+        elif len(values) > width:
+            row[None] = values[width:]
+        yield index, row
+
+
+def _iter_validated_rows(rows: Iterator[Tuple[int, CSVRow]]) -> Iterator[ValidatedRow]:
+    """Yield ``(line, row, parsed, error)`` for each non-blank CSV row.
+
+    Rows are validated a batch at a time with one list adapter call; only a
+    batch containing an invalid row falls back to per-row validation, which
+    is needed to attribute each error to its line.
+    """
+    batch: list[Tuple[int, CSVRow]] = []
+
+    def flush() -> Iterator[ValidatedRow]:
+        try:
+            parsed_rows = _ROWS_ADAPTER.validate_python([row for _, row in batch])
+        except ValidationError:
+            for index, row in batch:
+                try:
+                    yield index, row, CSVImportRow.model_validate(row), ""
+                except ValidationError as exc:
+                    yield index, row, None, exc.errors()[0].get("msg", "Invalid row")
+        else:
+            for (index, row), parsed in zip(batch, parsed_rows):
+                yield index, row, parsed, ""
+        batch.clear()
+
+    for index, row in rows:
+        batch.append((index, row))
+        if len(batch) >= _VALIDATION_BATCH_ROWS:
+            yield from flush()
+    if batch:
+        yield from flush()
+
+
+_UPSERT_BATCH_ROWS = 500
+
+
+def _write_rows(
+    batch: List[Tuple[int, CSVImportRow]],
+    *,
+    user_id: Optional[int],
+    known_activities: Dict[str, Activity],
+) -> List[Dict[str, object]]:
+    """Resolve activities and upsert entries for a batch; details in row order.
+
+    Activities and existing entries for the whole batch are each fetched with
+    one query, and the batch's inserts and updates each go out as a single
+    executemany.
+    """
+    creators = _prefetch_activities(batch, user_id=user_id, known=known_activities)
+    existing = _prefetch_entries([parsed for _, parsed in batch], user_id=user_id)
+    inserts: List[Dict[str, object]] = []
+    updates: List[Dict[str, object]] = []
+    outcomes: List[Dict[str, object]] = []
+    # Apply and upsert row by row: an entry takes its defaults from the
+    # activity as it stands at its own row, not after later rows changed it.
+    for position, (index, parsed) in enumerate(batch):
+        outcome: Dict[str, object] = {"row": index, "date": parsed.date, "activity": parsed.activity}
+        outcomes.append(outcome)
+        activity = known_activities[parsed.activity]
+        if position not in creators:
+            try:
+                _apply_activity_row(parsed, activity, user_id=user_id)
+            except ValueError as exc:
+                outcome.update(status="skipped", reason=str(exc))
+                continue
+        outcome["status"] = _upsert_entry(
+            parsed,
+            activity,
+            user_id=user_id,
+            existing=existing,
+            inserts=inserts,
+            updates=updates,
+        )
+
+    session = db.session
+    if inserts:
+        session.execute(insert(Entry), inserts)
+    if updates:
+        # ORM bulk UPDATE by primary key: one executemany for the batch
+        session.execute(update(Entry), updates)
+    return outcomes
+
+
+def _import_csv_impl(source: CSVSource, *, commit: bool = True, user_id: Optional[int] = None) -> Dict[str, object]:
     created = 0
     updated = 0
     skipped = 0
     details: list[Dict[str, object]] = []
     seen_pairs: Set[Tuple[str, str]] = set()
+    # Activities already resolved in this import; most files repeat a handful
+    # of activity names across many rows.
+    known_activities: Dict[str, Activity] = {}
+
+    pending: List[Tuple[int, CSVImportRow]] = []
+    pending_slots: List[int] = []
+
+    def flush_pending() -> None:
+        nonlocal created, updated, skipped
+        outcomes = _write_rows(pending, user_id=user_id, known_activities=known_activities)
+        for slot, outcome in zip(pending_slots, outcomes):
+            details[slot] = outcome
+            status = outcome["status"]
+            if status == "created":
+                created += 1
+            elif status == "updated":
+                updated += 1
+            else:
+                skipped += 1
+        pending.clear()
+        pending_slots.clear()
 
     session = db.session
 
     try:
-        with open(csv_path, newline="", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            if reader.fieldnames is None:
-                raise ValueError("CSV file is missing a header row")
-
-            for index, row in enumerate(reader, start=2):
-                if not row or not any((value or "").strip() for value in row.values()):
-                    continue
-
-                try:
-                    parsed = CSVImportRow.model_validate(row)
-                except ValidationError as exc:
-                    message = exc.errors()[0].get("msg", "Invalid row")
+        with _open_csv_source(source) as csvfile:
+            for index, row, parsed, message in _iter_validated_rows(_iter_csv_rows(csvfile)):
+                if parsed is None:
                     skipped += 1
                     details.append(
                         {
@@ -157,36 +341,13 @@ def _import_csv_impl(csv_path: str, *, commit: bool = True, user_id: Optional[in
                     continue
                 seen_pairs.add(key)
 
-                try:
-                    activity = _ensure_activity(parsed, user_id=user_id)
-                except ValueError as exc:
-                    skipped += 1
-                    details.append(
-                        {
-                            "row": index,
-                            "date": parsed.date,
-                            "activity": parsed.activity,
-                            "status": "skipped",
-                            "reason": str(exc),
-                        }
-                    )
-                    continue
-
-                status = _upsert_entry(parsed, activity, user_id=user_id)
-                if status == "created":
-                    _upsert_entry(parsed, activity, user_id=user_id)
-                    created += 1
-                else:
-                    updated += 1
-
-                details.append(
-                    {
-                        "row": index,
-                        "date": parsed.date,
-                        "activity": parsed.activity,
-                        "status": status,
-                    }
-                )
+                # reserve the row's slot so details stay in file order
+                pending_slots.append(len(details))
+                details.append({})
+                pending.append((index, parsed))
+                if len(pending) >= _UPSERT_BATCH_ROWS:
+                    flush_pending()
+            flush_pending()
 
         if commit:
             session.commit()
@@ -197,14 +358,15 @@ def _import_csv_impl(csv_path: str, *, commit: bool = True, user_id: Optional[in
     return {"created": created, "updated": updated, "skipped": skipped, "details": details}
 
 
-def import_csv(csv_path: str, *, commit: bool = True, user_id: Optional[int] = None) -> Dict[str, object]:
+def import_csv(source: CSVSource, *, commit: bool = True, user_id: Optional[int] = None) -> Dict[str, object]:
+    """Import entries from a CSV file path or a binary stream positioned at the header."""
     if has_app_context():
-        return _import_csv_impl(csv_path, commit=commit, user_id=user_id)
+        return _import_csv_impl(source, commit=commit, user_id=user_id)
 
     from app import app  # type: ignore circular import
 
     with app.app_context():
-        return _import_csv_impl(csv_path, commit=commit, user_id=user_id)
+        return _import_csv_impl(source, commit=commit, user_id=user_id)
 
 
 __all__ = ["import_csv"]
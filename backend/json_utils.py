@@ -0,0 +1,67 @@
+import dataclasses
+import decimal
+import uuid
+from datetime import date
+from typing import Any
+
+import orjson
+from flask import Response
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+
+_DUMP_OPTIONS = (
+    orjson.OPT_SORT_KEYS
+    | orjson.OPT_NON_STR_KEYS
+    | orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+)
+
+
+def _default(obj: Any) -> Any:
+    # Mirrors Flask's DefaultJSONProvider so clients keep receiving HTTP dates
+    # and string decimals.
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Encode exactly as ``jsonify`` would, for hand-assembled response bodies."""
+    return orjson.dumps(obj, default=_default, option=_DUMP_OPTIONS)
+
+
+def dumps_log_event(event_dict: Any, **kwargs: Any) -> str:
+    """structlog ``JSONRenderer`` serializer; honours the renderer's fallback."""
+    return orjson.dumps(
+        event_dict,
+        default=kwargs.get("default", repr),
+        option=orjson.OPT_NON_STR_KEYS,
+    ).decode()
+
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson for ``jsonify`` and ``request.get_json``."""
+
+    mimetype = "application/json"
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=_default, option=_DUMP_OPTIONS).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        option = _DUMP_OPTIONS
+        if self._app.debug:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=option),
+            mimetype=self.mimetype,
+        )
@@ -0,0 +1,37 @@
+"""Add composite index backing keyset pagination of entries."""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.engine.reflection import Inspector
+
+
+revision = "20241210_000009"
+down_revision = "20241205_000008"
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "ix_entries_user_date_activity_id"
+
+
+def _index_exists(inspector: Inspector, table_name: str, index_name: str) -> bool:
+    if not inspector.has_table(table_name):
+        return False
+    return any(index["name"] == index_name for index in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table("entries") and not _index_exists(inspector, "entries", INDEX_NAME):
+        op.create_index(
+            INDEX_NAME,
+            "entries",
+            ["user_id", sa.text("date DESC"), "activity", "id"],
+        )
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if _index_exists(inspector, "entries", INDEX_NAME):
+        op.drop_index(INDEX_NAME, table_name="entries")
@@ -70,6 +70,11 @@ class Entry(db.Model):
 
     user: Mapped[Optional["User"]] = relationship(back_populates="entries")
 
+    __table_args__ = (
+        # matches GET /entries ordering so keyset pages are an index range scan
+        db.Index("ix_entries_user_date_activity_id", "user_id", db.text("date DESC"), "activity", "id"),
+    )
+
     def __repr__(self) -> str:  # pragma: no cover - convenience
         return f"<Entry {self.date} {self.activity}>"
 
@@ -1,12 +1,17 @@
 from collections import defaultdict, deque
-from datetime import datetime, UTC
+from contextvars import ContextVar
+from datetime import datetime
 from threading import Lock
-from typing import Any, Dict, Optional
-from functools import wraps
+from typing import Any, Dict, Mapping, Optional, Tuple
+from functools import lru_cache, wraps
+from math import ceil
+from time import time
 
-from flask import current_app, jsonify, request, g
+import orjson
+from flask import Response, current_app, jsonify, request
 from pydantic import ValidationError as PydanticValidationError
 from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import UnsupportedMediaType
 
 from schemas import (
     ActivityCreatePayload,
@@ -21,33 +26,141 @@ from schemas import (
 )
 
 
+RATE_LIMIT_ALGORITHMS = ("gcra", "sliding", "fixed")
+
+
 class SimpleRateLimiter:
-    """Very small in-memory rate limiter suitable for a single-process dev setup."""
+    """Very small in-memory rate limiter suitable for a single-process dev setup.
 
-    def __init__(self):
-        self._calls = defaultdict(deque)
-        self._lock = Lock()
+    Three algorithms share the same ``(limit, window)`` configuration:
+
+    * ``gcra`` (default): each key keeps only its theoretical arrival time.
+      ``limit`` requests may burst at once, then one more every ``window / limit``.
+    * ``sliding``: a per-key log of timestamps; never more than ``limit`` calls in
+      any rolling window. Costs memory per call, so reserve it for sensitive
+      endpoints such as login.
+    * ``fixed``: a counter per calendar window; cheapest, but allows up to twice
+      the limit across a window boundary.
+
+    Keys are spread over ``LOCK_SHARDS`` locks so concurrent requests for
+    different users do not serialise on one mutex; a key's read-modify-write
+    always happens under its own shard's lock.
+    """
 
-    def allow(self, key: str, limit: int, window_seconds: int) -> bool:
-        now = datetime.now(UTC).timestamp()
-        with self._lock:
-            q = self._calls[key]
-            while q and q[0] <= now - window_seconds:
-                q.popleft()
-            if len(q) >= limit:
-                return False
-            q.append(now)
-            return True
+    LOCK_SHARDS = 32
+
+    def __init__(self):
+        self._tat: Dict[str, float] = {}
+        self._logs: Dict[str, deque] = defaultdict(deque)
+        self._windows: Dict[str, Tuple[float, int]] = {}
+        self._locks = tuple(Lock() for _ in range(self.LOCK_SHARDS))
+
+    def allow(self, key: str, limit: int, window_seconds: int, algo: str = "gcra") -> bool:
+        return self.acquire(key, limit, window_seconds, algo) == 0.0
+
+    def acquire(self, key: str, limit: int, window_seconds: int, algo: str = "gcra") -> float:
+        """Take one slot for ``key``; 0.0 when allowed, else seconds until a retry can pass.
+
+        Check, refill and take happen in one step under the key's shard lock,
+        so the answer and the ``Retry-After`` hint come from the same state.
+        """
+        if limit <= 0:
+            return float(window_seconds)
+        now = time()
+        with self._locks[hash(key) & (self.LOCK_SHARDS - 1)]:
+            if algo == "sliding":
+                return self._acquire_sliding(key, limit, window_seconds, now)
+            if algo == "fixed":
+                return self._acquire_fixed(key, limit, window_seconds, now)
+            return self._acquire_gcra(key, limit, window_seconds, now)
+
+    def _acquire_gcra(self, key: str, limit: int, window_seconds: int, now: float) -> float:
+        emission_interval = window_seconds / limit
+        tat = max(self._tat.get(key, now), now) + emission_interval
+        wait = tat - now - window_seconds
+        if wait > 1e-9:  # absorb float drift at the burst edge
+            return wait
+        self._tat[key] = tat
+        return 0.0
+
+    def _acquire_sliding(self, key: str, limit: int, window_seconds: int, now: float) -> float:
+        q = self._logs[key]
+        while q and q[0] <= now - window_seconds:
+            q.popleft()
+        if len(q) >= limit:
+            return q[0] + window_seconds - now
+        q.append(now)
+        return 0.0
+
+    def _acquire_fixed(self, key: str, limit: int, window_seconds: int, now: float) -> float:
+        window_start = now - (now % window_seconds)
+        started, count = self._windows.get(key, (window_start, 0))
+        if started != window_start:
+            count = 0
+        if count >= limit:
+            return window_start + window_seconds - now
+        self._windows[key] = (window_start, count + 1)
+        return 0.0
+
+    def reset(self) -> None:
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            self._tat.clear()
+            self._logs.clear()
+            self._windows.clear()
+        finally:
+            for lock in self._locks:
+                lock.release()
 
 
 rate_limiter = SimpleRateLimiter()
 
+_current_user: ContextVar[Optional[Dict[str, Any]]] = ContextVar("mosaic_current_user", default=None)
+# The id alone is what most hot paths need (rate-limit keys, logging, scoping);
+# a dedicated slot spares them the dict lookup.
+_current_user_id: ContextVar[Optional[int]] = ContextVar("mosaic_current_user_id", default=None)
+_csrf_token: ContextVar[Optional[str]] = ContextVar("mosaic_csrf_token", default=None)
+
+
+def get_current_user() -> Optional[Dict[str, Any]]:
+    """Return the authenticated user for the active request, if any."""
+    return _current_user.get()
+
 
-def rate_limit(endpoint_name: str, limit: int, window_seconds: int):
-    """Check and enforce per-endpoint rate limiting."""
-    user_obj = getattr(g, "current_user", None)
-    if user_obj:
-        identifier = f"user:{user_obj['id']}"
+def get_current_user_id() -> Optional[int]:
+    return _current_user_id.get()
+
+
+def get_csrf_token() -> Optional[str]:
+    return _csrf_token.get()
+
+
+def set_current_user(user: Dict[str, Any], csrf_token: Optional[str] = None) -> None:
+    _current_user.set(user)
+    _current_user_id.set(user.get("id"))
+    _csrf_token.set(csrf_token)
+
+
+def clear_current_user() -> None:
+    """Drop request identity; worker threads are reused across requests."""
+    _current_user.set(None)
+    _current_user_id.set(None)
+    _csrf_token.set(None)
+
+
+def rate_limit(endpoint_name: str, limit: int, window_seconds: int, algo: Optional[str] = None):
+    """Check and enforce per-endpoint rate limiting.
+
+    ``algo`` defaults to the ``"algo"`` field of the endpoint's ``RATE_LIMITS``
+    entry, falling back to GCRA.
+    """
+    if algo is None:
+        rule = current_app.config.get("RATE_LIMITS", {}).get(endpoint_name) or {}
+        algo = rule.get("algo", "gcra")
+    user_id = _current_user_id.get()
+    if user_id is not None:
+        identifier = f"user:{user_id}"
     else:
         identifier = (
             request.headers.get("X-API-Key")
@@ -55,11 +168,34 @@ def rate_limit(endpoint_name: str, limit: int, window_seconds: int):
             or "anonymous"
         )
     key = f"{identifier}:{endpoint_name}"
-    if not rate_limiter.allow(key, limit, window_seconds):
-        return error_response("too_many_requests", "Too many requests", 429)
+    retry_after = rate_limiter.acquire(key, limit, window_seconds, algo)
+    if retry_after:
+        response, status = static_error_response("too_many_requests", "Too many requests", 429)
+        response.headers["Retry-After"] = str(max(1, ceil(retry_after)))
+        return response, status
     return None
 
 
+def enforce_rate_limit(
+    rule_name: str,
+    bucket: Optional[str] = None,
+    default: Optional[Mapping[str, Any]] = None,
+):
+    """Apply the ``RATE_LIMITS[rule_name]`` entry; ``bucket`` names the counter.
+
+    Entries are read per call so runtime config changes apply.
+    """
+    rule = current_app.config["RATE_LIMITS"].get(rule_name, default)
+    if rule is None:
+        raise KeyError(rule_name)
+    return rate_limit(
+        bucket or rule_name,
+        int(rule["limit"]),
+        int(rule["window"]),
+        rule.get("algo", "gcra"),
+    )
+
+
 def limit_request(endpoint_name: str, *, per_minute: int):
     """Convenience wrapper to limit requests per minute."""
     per_minute = max(int(per_minute), 1)
@@ -84,27 +220,40 @@ def require_api_key():
         or request.args.get("api_key")
     )
     if provided != api_key:
-        return error_response("unauthorized", "Unauthorized", 401)
+        return static_error_response("unauthorized", "Unauthorized", 401)
     return None
 
 
 def require_admin(fn):
     @wraps(fn)
     def wrapped(*args, **kwargs):
-        user_obj = getattr(g, "current_user", None)
+        user_obj = _current_user.get()
         if not user_obj or not user_obj.get("is_admin"):
-            return error_response("forbidden", "Admin privileges required", 403)
+            return static_error_response("forbidden", "Admin privileges required", 403)
         return fn(*args, **kwargs)
 
     return wrapped
 
 
+def require_user(fn):
+    """Pass the caller's ``user_id`` and ``is_admin`` to the view as keywords."""
+
+    @wraps(fn)
+    def wrapped(*args, **kwargs):
+        user_obj = _current_user.get()
+        if not user_obj or user_obj.get("id") is None:
+            return static_error_response("unauthorized", "Missing user context", 401)
+        return fn(*args, user_id=user_obj["id"], is_admin=bool(user_obj.get("is_admin")), **kwargs)
+
+    return wrapped
+
+
 def jwt_required():
     def decorator(fn):
         @wraps(fn)
         def wrapped(*args, **kwargs):
-            if not getattr(g, "current_user", None):
-                return error_response("unauthorized", "Missing or invalid access token", 401)
+            if not _current_user.get():
+                return static_error_response("unauthorized", "Missing or invalid access token", 401)
             return fn(*args, **kwargs)
 
         return wrapped
@@ -144,6 +293,39 @@ def error_response(
     return jsonify(payload), status
 
 
+def parse_json_body() -> Any:
+    """Decode the request body with orjson.
+
+    Mirrors ``request.get_json()``: 415 for non-JSON content types and a
+    ``BadRequest`` (``bad_request``) for an empty or malformed body, but does
+    not keep the raw bytes or the parsed value around on the request.
+    """
+    if not request.is_json:
+        raise UnsupportedMediaType(
+            "Did not attempt to load JSON data because the request Content-Type was not 'application/json'."
+        )
+    try:
+        return orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError as exc:
+        return request.on_json_loading_failed(exc)
+
+
+@lru_cache(maxsize=32)
+def _static_error_body(code: str, message: str, app_id: int) -> bytes:
+    payload = {"error": {"code": code, "message": message, "details": {}}}
+    return current_app.json.dumps(payload).encode("utf-8")
+
+
+def static_error_response(code: str, message: str, status: int):
+    """``error_response`` for fixed-text errors on hot paths (auth hooks).
+
+    The body is serialized once per (code, message) and reused; only the
+    Response object is built per call. Never pass interpolated messages here.
+    """
+    body = _static_error_body(code, message, id(current_app._get_current_object()))
+    return Response(body, status=status, mimetype="application/json"), status
+
+
 def _extract_error_info(exc: PydanticValidationError) -> tuple[str, Dict[str, Any]]:
     errors = exc.errors()
     missing_fields = [
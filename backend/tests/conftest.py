@@ -3,6 +3,7 @@ import os
 import pytest
 
 from app import app
+from audit import flush_activity_logs, reset_table_missing_flag
 from extensions import db
 from sqlalchemy import text
 from security import rate_limiter
@@ -38,11 +39,13 @@ def client():
     except Exception as exc:  # pragma: no cover - skip if database unavailable
         pytest.skip(f"PostgreSQL database not available: {exc}")
 
-    rate_limiter._calls.clear()  # type: ignore[attr-defined]
+    rate_limiter.reset()
+    reset_table_missing_flag()
 
     with app.test_client() as client:
         yield client
 
+    flush_activity_logs()
     with app.app_context():
         db.session.remove()
         db.session.execute(text("DROP SCHEMA IF EXISTS public CASCADE"))
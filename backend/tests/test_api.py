@@ -1,10 +1,15 @@
 import io
+import threading
+import time
 import uuid
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 
 import pytest
+from flask import jsonify
 
-from app import CacheScope, _cache_storage, build_cache_key
+from app import CacheScope, _cache_storage, app, build_cache_key
+from json_utils import ORJSONProvider
 
 
 @pytest.fixture
@@ -201,6 +206,17 @@ def test_add_entry_validation(client, auth_headers):
     assert response.get_json()["error"]["code"] == "invalid_input"
 
 
+def test_add_entry_malformed_json_is_bad_request(client, auth_headers):
+    response = client.post(
+        "/add_entry",
+        data=b'{"activity": "Run",',
+        content_type="application/json",
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
+    assert response.get_json()["error"]["code"] == "bad_request"
+
+
 def test_rate_limit_enforced(client, auth_headers):
     from app import app
 
@@ -216,6 +232,8 @@ def test_rate_limit_enforced(client, auth_headers):
         r3 = client.post("/add_entry", json=payload, headers=auth_headers)
         assert r3.status_code == 429
         assert r3.get_json()["error"]["code"] == "too_many_requests"
+        # GCRA: the next slot opens one emission interval (60s / 2) later
+        assert r3.headers["Retry-After"] == "30"
     finally:
         app.config["RATE_LIMITS"]["add_entry"] = original
 
@@ -277,6 +295,55 @@ def test_import_csv_endpoint(client, auth_headers):
     # CSV import should have created an activity with category
 
 
+def test_import_csv_accepts_raw_body(client, auth_headers):
+    csv_data = (
+        "date,activity,value,note,description,category,goal\n"
+        "2024-03-02,Row,3,,Rowing,Fitness,10\n"
+    )
+    response = client.post(
+        "/import_csv",
+        data=csv_data.encode("utf-8"),
+        content_type="text/csv",
+        headers={**auth_headers, "Content-Disposition": 'attachment; filename="rows.csv"'},
+    )
+    assert response.status_code == 200
+    assert response.get_json()["summary"]["created"] == 1
+
+    empty = client.post("/import_csv", data=b"", content_type="text/csv", headers=auth_headers)
+    assert empty.status_code == 400
+    assert empty.get_json()["error"]["code"] == "missing_file"
+
+
+def test_import_csv_respond_async_runs_in_background(client, auth_headers):
+    csv_data = (
+        "date,activity,value,note,description,category,goal\n"
+        "2024-03-03,Swim,2,,Swimming,Fitness,5\n"
+    )
+    response = client.post(
+        "/import_csv",
+        data=csv_data.encode("utf-8"),
+        content_type="text/csv",
+        headers={**auth_headers, "Prefer": "respond-async"},
+    )
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+    assert response.headers["Location"] == f"/import_csv/{job_id}"
+
+    deadline = time.monotonic() + 10
+    while True:
+        status = client.get(f"/import_csv/{job_id}", headers=auth_headers)
+        assert status.status_code == 200
+        body = status.get_json()
+        if body["status"] in ("completed", "failed") or time.monotonic() > deadline:
+            break
+        time.sleep(0.05)
+    assert body["status"] == "completed"
+    assert body["summary"]["created"] == 1
+
+    missing = client.get("/import_csv/unknown", headers=auth_headers)
+    assert missing.status_code == 404
+
+
 def test_delete_entry_not_found_returns_standard_error(client, auth_headers):
     response = client.delete("/entries/9999", headers=auth_headers)
     assert response.status_code == 404
@@ -647,6 +714,21 @@ def test_entries_pagination(client, auth_headers):
     assert second_page.status_code == 200
     assert len(second_page.get_json()) == 2
 
+    cursor = first_page.headers["X-Next-Cursor"]
+    keyset_page = client.get(f"/entries?limit=2&cursor={cursor}", headers=auth_headers)
+    assert keyset_page.status_code == 200
+    assert [row["id"] for row in keyset_page.get_json()] == [row["id"] for row in second_page.get_json()]
+
+    last_page = client.get(
+        f"/entries?limit=2&cursor={keyset_page.headers['X-Next-Cursor']}", headers=auth_headers
+    )
+    assert last_page.get_json() == []
+    assert "X-Next-Cursor" not in last_page.headers
+
+    invalid = client.get("/entries?cursor=not-a-cursor", headers=auth_headers)
+    assert invalid.status_code == 400
+    assert invalid.get_json()["error"]["code"] == "invalid_query"
+
 
 def test_activities_pagination(client, auth_headers):
     for idx in range(5):
@@ -719,6 +801,41 @@ def test_today_cache_invalidation(client, auth_headers):
     assert len(refreshed.get_json()) == base_count + 1
 
 
+def test_today_concurrent_misses_share_one_query(client, auth_headers, monkeypatch):
+    import app as app_module
+
+    _cache_storage.clear()
+    calls = []
+    release = threading.Event()
+    original = app_module._query_today_rows
+
+    def slow_query(*args, **kwargs):
+        calls.append(args)
+        release.wait(5)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(app_module, "_query_today_rows", slow_query)
+    responses = []
+
+    def fetch():
+        with app.test_client() as worker:
+            responses.append(worker.get("/today?date=2024-06-02", headers=auth_headers))
+
+    workers = [threading.Thread(target=fetch) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    while not calls:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    release.set()
+    for worker in workers:
+        worker.join()
+
+    assert len(calls) == 1
+    assert [resp.status_code for resp in responses] == [200, 200, 200]
+    assert len({resp.get_data() for resp in responses}) == 1
+
+
 def test_stats_cache_invalidation(client, auth_headers):
     _cache_storage.clear()
     target_date = "2024-06-01"
@@ -848,3 +965,34 @@ def test_negative_activity_ignored_in_stats(client, auth_headers):
     assert payload["goal_completion_today"] == pytest.approx(0.0)
     assert payload["positive_vs_negative"]["positive"] == 0
     assert payload["positive_vs_negative"]["negative"] == 0
+
+
+def test_jsonify_uses_orjson_with_flask_compatible_output():
+    assert isinstance(app.json, ORJSONProvider)
+    with app.test_request_context():
+        response = jsonify({"b": Decimal("1.5"), "a": date(2024, 1, 2)})
+    assert response.get_data() == b'{"a":"Tue, 02 Jan 2024 00:00:00 GMT","b":"1.5"}'
+
+
+def test_cors_allows_only_configured_origins(client):
+    allowed = client.get("/healthz", headers={"Origin": "http://LOCALHOST:3000"})
+    assert allowed.headers.get("Access-Control-Allow-Origin") == "http://LOCALHOST:3000"
+
+    for origin in ("http://localhost:3000.evil.test", "http://evil.test"):
+        denied = client.get("/healthz", headers={"Origin": origin})
+        assert "Access-Control-Allow-Origin" not in denied.headers
+
+
+def test_cors_preflight_short_circuits_auth(client):
+    resp = client.options(
+        "/add_entry",
+        headers={
+            "Origin": "http://localhost:3000",
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "Content-Type, X-CSRF-Token, X-Unknown",
+        },
+    )
+    assert resp.status_code == 204
+    assert resp.headers["Access-Control-Allow-Origin"] == "http://localhost:3000"
+    assert resp.headers["Access-Control-Allow-Credentials"] == "true"
+    assert resp.headers["Access-Control-Allow-Headers"] == "Content-Type, X-CSRF-Token"
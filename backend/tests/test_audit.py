@@ -0,0 +1,22 @@
+import audit
+from app import app
+from audit import flush_activity_logs, log_event
+from extensions import db
+from sqlalchemy import text
+
+
+def test_missing_activity_log_table_pauses_inserts(client):
+    with app.app_context():
+        db.session.execute(text("DROP TABLE activity_logs"))
+        db.session.commit()
+        log_event("test.first", "first event")
+    flush_activity_logs()
+
+    deadline = audit._table_missing_until
+    assert deadline > 0
+
+    # while the pause is active no INSERT is attempted, so the deadline stays put
+    with app.app_context():
+        log_event("test.second", "second event")
+    flush_activity_logs()
+    assert audit._table_missing_until == deadline
@@ -4,7 +4,12 @@ import time
 import jwt
 import pytest
 
-from app import app, cache_get, cache_set, invalidate_cache
+from app import CacheScope, app, cache_get, cache_set, invalidate_cache
+from audit import flush_activity_logs
+from extensions import db
+from models import ActivityLog
+from sqlalchemy import text
+from security import get_current_user
 
 
 def test_register_and_login_flow(client):
@@ -28,6 +33,19 @@ def test_register_and_login_flow(client):
         },
     )
     assert resp.status_code == 200
+    # identity must not outlive the request on a reused worker thread
+    assert get_current_user() is None
+
+
+def test_register_event_is_persisted_in_background(client):
+    username = f"user_{uuid.uuid4().hex[:6]}"
+    register = client.post("/register", json={"username": username, "password": "StrongPass123"})
+    assert register.status_code == 201
+
+    flush_activity_logs()
+    with app.app_context():
+        events = db.session.query(ActivityLog).filter_by(event_type="auth.register").all()
+    assert sum(event.context["username"] == username for event in events) == 1
 
 
 def test_login_invalid_credentials(client):
@@ -75,6 +93,40 @@ def test_expired_token_rejected(client, monkeypatch):
     assert resp.get_json()["error"]["code"] == "token_expired"
 
 
+def test_cached_token_still_expires(client, monkeypatch):
+    username = f"user_{uuid.uuid4().hex[:6]}"
+    password = "StrongPass123"
+    client.post("/register", json={"username": username, "password": password})
+    tokens = client.post("/login", json={"username": username, "password": password}).get_json()
+    headers = {
+        "Authorization": f"Bearer {tokens['access_token']}",
+        "X-CSRF-Token": tokens["csrf_token"],
+    }
+    assert client.get("/entries", headers=headers).status_code == 200
+
+    decode_calls = []
+    original_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        decode_calls.append(args)
+        return original_decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt, "decode", counting_decode)
+    assert client.get("/entries", headers=headers).status_code == 200
+    assert decode_calls == []
+
+    # once past exp the cached payload is dropped and the token re-validated
+    def expired_decode(*args, **kwargs):
+        raise jwt.ExpiredSignatureError("expired")
+
+    original_time = time.time
+    monkeypatch.setattr("app.time", lambda: original_time() + 2 * 60 * 60)
+    monkeypatch.setattr(jwt, "decode", expired_decode)
+    resp = client.get("/entries", headers=headers)
+    assert resp.status_code == 401
+    assert resp.get_json()["error"]["code"] == "token_expired"
+
+
 def test_cache_helpers(monkeypatch):
     key = ("cache",)
     cache_set("unit", key, {"value": 1}, ttl=5)
@@ -91,3 +143,46 @@ def test_cache_helpers(monkeypatch):
     cache_set("unit", key, {"value": 2}, ttl=5)
     invalidate_cache("unit")
     assert cache_get("unit", key) is None
+
+
+def test_invalidate_cache_per_user_keeps_other_users():
+    scope_a = CacheScope(user_id=101, is_admin=False)
+    scope_b = CacheScope(user_id=202, is_admin=False)
+    scope_admin = CacheScope(user_id=1, is_admin=True)
+    for scope in (scope_a, scope_b, scope_admin):
+        cache_set("unit_scoped", ("k",), {"user": scope.user_id}, ttl=30, scope=scope)
+
+    invalidate_cache("unit_scoped", user_id=101)
+
+    assert cache_get("unit_scoped", ("k",), scope=scope_a) is None
+    assert cache_get("unit_scoped", ("k",), scope=scope_admin) is None
+    assert cache_get("unit_scoped", ("k",), scope=scope_b) == {"user": 202}
+
+    invalidate_cache("unit_scoped")
+    assert cache_get("unit_scoped", ("k",), scope=scope_b) is None
+
+
+def test_list_users_revalidates_with_etag(client):
+    username = f"admin_{uuid.uuid4().hex[:6]}"
+    password = "StrongPass123"
+    assert client.post("/register", json={"username": username, "password": password}).status_code == 201
+    with app.app_context():
+        db.session.execute(
+            text("UPDATE users SET is_admin = TRUE WHERE username = :username"), {"username": username}
+        )
+        db.session.commit()
+    tokens = client.post("/login", json={"username": username, "password": password}).get_json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    first = client.get("/users", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    unchanged = client.get("/users", headers={**headers, "If-None-Match": etag})
+    assert unchanged.status_code == 304
+
+    other = f"user_{uuid.uuid4().hex[:6]}"
+    assert client.post("/register", json={"username": other, "password": password}).status_code == 201
+    changed = client.get("/users", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert other in {user["username"] for user in changed.get_json()}
@@ -1,4 +1,5 @@
 import io
+import json
 import zipfile
 from pathlib import Path
 
@@ -56,16 +57,19 @@ def test_backup_run_creates_files(client, auth_headers, backup_env, tmp_path):
     backup_info = payload["backup"]
 
     backup_dir = Path(app.config["BACKUP_DIR"])
-    assert (backup_dir / backup_info["json"]).exists()
-    assert (backup_dir / backup_info["csv"]).exists()
     zip_path = backup_dir / backup_info["zip"]
     assert zip_path.exists()
+    # the dumps are written straight into the archive, not next to it
+    assert sorted(path.name for path in backup_dir.iterdir()) == [backup_info["zip"]]
 
     # Ensure the zip contains the expected files
     with zipfile.ZipFile(zip_path, "r") as archive:
         names = archive.namelist()
         assert backup_info["json"] in names
         assert backup_info["csv"] in names
+        dump = json.loads(archive.read(backup_info["json"]))
+        assert dump["initiated_by"] == "api"
+        assert archive.read(backup_info["csv"]).startswith(b"dataset,id,date,")
 
     status_resp = client.get("/backup/status", headers=auth_headers)
     status = status_resp.get_json()
@@ -107,3 +111,15 @@ def test_backup_download_endpoint(client, auth_headers, backup_env):
     content = download_resp.data
     with zipfile.ZipFile(io.BytesIO(content), "r") as archive:
         assert backup_filename.replace(".zip", ".json") in archive.namelist()
+
+
+def test_backup_download_hands_off_to_proxy(client, auth_headers, backup_env, monkeypatch):
+    monkeypatch.setitem(app.config, "BACKUP_ACCEL_REDIRECT_PREFIX", "/_backups/")
+    run_resp = client.post("/backup/run", headers=auth_headers)
+    backup_filename = run_resp.get_json()["backup"]["zip"]
+
+    download_resp = client.get(f"/backup/download/{backup_filename}", headers=auth_headers)
+    assert download_resp.status_code == 200
+    assert download_resp.headers["X-Accel-Redirect"] == f"/_backups/{backup_filename}"
+    assert backup_filename in download_resp.headers["Content-Disposition"]
+    assert download_resp.data == b""
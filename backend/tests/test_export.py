@@ -77,6 +77,7 @@ def test_export_json_includes_entries_and_activities(client, auth_headers):
     assert payload["activities"][0]["name"] == "Reading"
     assert response.headers["X-Total-Entries"] == "2"
     assert response.headers["X-Total-Activities"] == "2"
+    assert response.headers["X-Accel-Buffering"] == "no"
 
 
 def test_export_pagination_offset(client, auth_headers):
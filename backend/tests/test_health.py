@@ -42,3 +42,19 @@ def test_health_cli_output(client):
     assert result.exit_code == 0
     assert "Metric" in result.output
     assert "Status: HEALTHY" in result.output
+
+
+def test_db_health_probe_is_cached_briefly(monkeypatch):
+    monkeypatch.setattr(app_module, "_db_health_cache", None)
+    with app.app_context():
+        assert app_module._check_db_connection() is True
+
+        def fail_connect():
+            raise AssertionError("probe should be served from cache")
+
+        monkeypatch.setattr(app_module.db.engine, "connect", fail_connect)
+        assert app_module._check_db_connection() is True
+
+        original_time = app_module.time
+        monkeypatch.setattr(app_module, "time", lambda: original_time() + 60)
+        assert app_module._check_db_connection() is False
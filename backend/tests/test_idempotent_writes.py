@@ -26,6 +26,7 @@ def test_add_entry_idempotent(client):
     second = client.post("/add_entry", json=payload, headers={**headers, "X-Idempotency-Key": key})
     assert second.status_code == first.status_code
     assert second.get_json()["message"]
+    assert second.get_data() == first.get_data()
 
     today = client.get("/today", query_string={"date": payload["date"]}, headers=headers)
     assert today.status_code == 200
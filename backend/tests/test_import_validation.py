@@ -1,3 +1,4 @@
+import io
 from pathlib import Path
 from typing import Any, Dict, List, Sequence, cast
 
@@ -130,3 +131,42 @@ def test_import_csv_updates_existing_and_creates_new(tmp_path):
         assert created_row.date == "2024-03-02"
         assert created_row.activity_category == "Leisure"
         assert pytest.approx(created_row.activity_goal) == 7.0
+
+
+@pytest.mark.usefixtures("client")
+def test_import_csv_accepts_binary_stream():
+    content = "date,activity,value,note,description,category,goal\n2024-03-05,Row,4,,Rowing,Fitness,5\n"
+    stream = io.BytesIO(content.encode("utf-8"))
+
+    summary = cast(Dict[str, Any], import_csv(stream))
+
+    assert summary["created"] == 1
+    assert not stream.closed
+
+
+@pytest.mark.usefixtures("client")
+def test_import_csv_entries_use_activity_state_at_their_row(tmp_path):
+    csv_path = _write_csv(
+        tmp_path,
+        "ordered.csv",
+        [
+            "2024-03-01,Read,1,,,Leisure,5",
+            "2024-03-02,Read,1,,,,5",
+            "2024-03-03,Read,1,,,Study,5",
+        ],
+    )
+
+    summary = cast(Dict[str, Any], import_csv(str(csv_path)))
+    assert summary["created"] == 3
+
+    with app.app_context():
+        categories = dict(
+            db.session.execute(
+                select(Entry.date, Entry.activity_category).where(Entry.activity == "Read")
+            ).all()
+        )
+        assert categories == {"2024-03-01": "Leisure", "2024-03-02": "Leisure", "2024-03-03": "Study"}
+        activity_category = db.session.execute(
+            select(Activity.category).where(Activity.name == "Read")
+        ).scalar_one()
+        assert activity_category == "Study"
@@ -12,7 +12,7 @@ def metrics_test_boom():
     raise RuntimeError("boom")
 
 
-app.config["PUBLIC_ENDPOINTS"].add("metrics_test_boom")
+app.config["PUBLIC_ENDPOINTS"] = app.config["PUBLIC_ENDPOINTS"] | {"metrics_test_boom"}
 
 
 def _find_endpoint_metrics(snapshot: Dict[str, Any], endpoint: str) -> Dict[str, Any]:
@@ -57,3 +57,16 @@ def test_metrics_error_counters(client):
     assert register_metrics["errors_4xx"] == 1
     boom_metrics = _find_endpoint_metrics(snapshot, "metrics_test_boom")
     assert boom_metrics["errors_5xx"] == 1
+
+
+def test_metrics_text_rerenders_only_after_new_requests(client):
+    reset_metrics_state()
+    assert client.get("/").status_code == 200
+
+    first = app_module.get_metrics_text_bytes()
+    assert app_module.get_metrics_text_bytes() is first
+
+    assert client.get("/").status_code == 200
+    refreshed = app_module.get_metrics_text_bytes()
+    assert refreshed is not first
+    assert b'mosaic_requests_total{method="GET",endpoint="home"} 2' in refreshed
@@ -11,7 +11,8 @@ def test_import_csv_rolls_back_on_failure(tmp_path, client, monkeypatch):
     csv_path = tmp_path / "rollback.csv"
     csv_path.write_text(
         "date,activity,value,note,description,category,goal\n"
-        "2024-03-01,Swim,2,,Morning swim,Fitness,12\n",
+        "2024-03-01,Swim,2,,Morning swim,Fitness,12\n"
+        "2024-03-02,Swim,3,,Evening swim,Fitness,12\n",
         encoding="utf-8",
     )
 
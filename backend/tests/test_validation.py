@@ -3,9 +3,12 @@ from datetime import datetime
 
 import pytest
 from werkzeug.datastructures import FileStorage, MultiDict
+from werkzeug.exceptions import BadRequest, UnsupportedMediaType
 
+from app import app
 from security import (
     ValidationError,
+    parse_json_body,
     validate_activity_create_payload,
     validate_activity_update_payload,
     validate_csv_import_payload,
@@ -99,3 +102,17 @@ def test_validate_finalize_day_payload_invalid_date():
     with pytest.raises(ValidationError) as err:
         validate_finalize_day_payload({"date": "2024-99-01"})
     assert err.value.message == "Date must be in YYYY-MM-DD format"
+
+
+def test_parse_json_body_handles_empty_malformed_and_non_json():
+    with app.test_request_context(method="POST", data=b'{"a": [1, 2]}', content_type="application/json"):
+        assert parse_json_body() == {"a": [1, 2]}
+
+    for body in (b"", b"{not json"):
+        with app.test_request_context(method="POST", data=body, content_type="application/json"):
+            with pytest.raises(BadRequest):
+                parse_json_body()
+
+    with app.test_request_context(method="POST", data=b"{}", content_type="text/plain"):
+        with pytest.raises(UnsupportedMediaType):
+            parse_json_body()
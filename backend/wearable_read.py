@@ -1,7 +1,7 @@
 from datetime import datetime, date, timedelta, timezone
 from typing import Dict, Optional
 
-from flask import Blueprint, jsonify, request, g
+from flask import Blueprint, jsonify, request
 from sqlalchemy import func
 from sqlalchemy.sql import label
 
@@ -11,7 +11,7 @@ from models import (
     WearableCanonicalSleepSession,
     WearableDailyAgg,
 )
-from security import ValidationError, error_response, jwt_required
+from security import ValidationError, error_response, get_current_user_id, jwt_required
 from schemas_wearable import (
     WearableDayResponse,
     WearableHrSummary,
@@ -25,10 +25,7 @@ wearable_read_bp = Blueprint("wearable_read", __name__)
 
 
 def _current_user_id() -> Optional[int]:
-    current = getattr(g, "current_user", None)
-    if isinstance(current, dict):
-        return current.get("id")
-    return None
+    return get_current_user_id()
 
 
 def _day_start_for(target_date: date) -> datetime: